@@ -1,7 +1,12 @@
 import tkinter as tk
-import random
-import json
-import os
+from tkinter import messagebox
+import time
+from collections import deque
+
+import Game2048Engine as engine
+import Game2048Solver
+from Game2048History import UndoHistory
+from Game2048Leaderboard import Leaderboard
 
 # Constants
 SIZE = 4
@@ -14,13 +19,29 @@ TILE_COLORS = {
     512: "#edc850", 1024: "#edc53f", 2048: "#edc22e",
 }
 FONT = ("Verdana", 40, "bold")
+AUTO_PLAY_DELAY = 50  # milliseconds between solver moves
+UNDO_DEPTH = 64  # number of moves that can be undone
+FRAME_INTERVAL = 16  # milliseconds per frame; at most one queued move per frame
+FRAME_SAMPLES = 60  # frames averaged by the frame-time overlay
+LEADERBOARD_SIZE = 5  # entries shown under the board
+KEY_DIRECTIONS = {"Up": "up", "Down": "down", "Left": "left", "Right": "right"}
 
 class Game2048:
-    def __init__(self, root):
+    def __init__(self, root, undo_depth=UNDO_DEPTH):
         self.root = root
-        self.board = [[0] * SIZE for _ in range(SIZE)]
-        self.score = 0
-        self.history = []
+        self.engine = engine.GameEngine()
+        self.history = UndoHistory(undo_depth)
+        self.moves = 0
+        self.solver = None
+        self.auto_play = False
+        self.auto_timer = None  # after() id of the next auto_step, so only one chain runs
+        self.rendered_board = None
+        self.rendered_score = None
+        self.pending_direction = None
+        self.frame_timer = None
+        self.coalesced_keys = 0
+        self.frame_times = deque(maxlen=FRAME_SAMPLES)
+        self.show_frame_stats = False
         self.init_gui()
         self.start_game()
     
@@ -39,145 +60,175 @@ class Game2048:
         self.score_label.pack()
 
         self.leaderboard = self.load_leaderboard()
-        self.leaderboard_label = tk.Label(self.root, text="Leaderboard: \n" + "\n".join(self.leaderboard), font=("Verdana", 14))
+        self.leaderboard_label = tk.Label(self.root, text=self.leaderboard_text(), font=("Verdana", 14))
         self.leaderboard_label.pack()
 
+        self.auto_play_button = tk.Button(self.root, text="Auto Play", command=self.toggle_auto_play)
+        self.auto_play_button.pack(pady=5)
+
+        self.frame_label = tk.Label(self.root, text="", font=("Courier", 10), justify=tk.LEFT)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    @property
+    def board(self):
+        return self.engine.grid()
+
+    @property
+    def score(self):
+        return self.engine.score
+
     def start_game(self):
         self.add_tile()
         self.add_tile()
         self.update_gui()
     
     def add_tile(self):
-        empty_cells = [(i, j) for i in range(SIZE) for j in range(SIZE) if self.board[i][j] == 0]
-        if empty_cells:
-            i, j = random.choice(empty_cells)
-            self.board[i][j] = random.choice([2, 4])
+        self.engine.add_tile()
     
     def update_gui(self):
-        for i in range(SIZE):
-            for j in range(SIZE):
-                value = self.board[i][j]
-                if value == 0:
-                    self.cells[i][j].config(text="", bg=EMPTY_CELL_COLOR)
+        start = time.perf_counter()
+        board = self.engine.board
+        # Only reconfigure the cells whose nibble differs from the last render
+        if self.rendered_board is None:
+            changed = (1 << (4 * SIZE * SIZE)) - 1
+        else:
+            changed = board ^ self.rendered_board
+        redrawn = 0
+        for index in range(SIZE * SIZE):
+            if (changed >> (4 * index)) & engine.CELL_MASK:
+                exponent = (board >> (4 * index)) & engine.CELL_MASK
+                cell = self.cells[index // SIZE][index % SIZE]
+                if exponent == 0:
+                    cell.config(text="", bg=EMPTY_CELL_COLOR)
                 else:
-                    self.cells[i][j].config(text=str(value), bg=TILE_COLORS.get(value, "#3c3a32"))
-        self.score_label.config(text=f"Score: {self.score}")
+                    value = 1 << exponent
+                    cell.config(text=str(value), bg=TILE_COLORS.get(value, "#3c3a32"))
+                redrawn += 1
+        self.rendered_board = board
+        if self.engine.score != self.rendered_score:
+            self.score_label.config(text=f"Score: {self.score}")
+            self.rendered_score = self.engine.score
+        self.record_frame(time.perf_counter() - start, redrawn)
+
+    def record_frame(self, seconds, redrawn):
+        self.frame_times.append(seconds)
+        if self.show_frame_stats:
+            average = sum(self.frame_times) / len(self.frame_times)
+            self.frame_label.config(text=(f"render {seconds * 1000:.2f} ms (avg {average * 1000:.2f} ms)\n"
+                                          f"cells redrawn: {redrawn}/{SIZE * SIZE}\n"
+                                          f"keys coalesced: {self.coalesced_keys}"))
+
+    def toggle_frame_stats(self):
+        self.show_frame_stats = not self.show_frame_stats
+        if self.show_frame_stats:
+            self.frame_label.pack()
+        else:
+            self.frame_label.pack_forget()
 
     def move(self, direction):
-        self.save_state()
-        moved = False
-        if direction == "up":
-            for j in range(SIZE):
-                col = [self.board[i][j] for i in range(SIZE)]
-                new_col, score_add = self.merge(col)
-                for i in range(SIZE):
-                    if self.board[i][j] != new_col[i]:
-                        moved = True
-                    self.board[i][j] = new_col[i]
-                self.score += score_add
-        elif direction == "down":
-            for j in range(SIZE):
-                col = [self.board[i][j] for i in range(SIZE-1, -1, -1)]
-                new_col, score_add = self.merge(col)
-                for i in range(SIZE):
-                    if self.board[SIZE-1-i][j] != new_col[i]:
-                        moved = True
-                    self.board[SIZE-1-i][j] = new_col[i]
-                self.score += score_add
-        elif direction == "left":
-            for i in range(SIZE):
-                row = self.board[i]
-                new_row, score_add = self.merge(row)
-                if self.board[i] != new_row:
-                    moved = True
-                self.board[i] = new_row
-                self.score += score_add
-        elif direction == "right":
-            for i in range(SIZE):
-                row = self.board[i][::-1]
-                new_row, score_add = self.merge(row)
-                new_row.reverse()
-                if self.board[i] != new_row:
-                    moved = True
-                self.board[i] = new_row
-                self.score += score_add
+        previous_state = (self.engine.score, self.engine.board)
+        moved = self.engine.move(direction)
         
         if moved:
+            self.save_state(*previous_state)
+            self.moves += 1
             self.add_tile()
             self.update_gui()
             if self.is_game_over():
                 self.game_over()
 
-    def merge(self, tiles):
-        new_tiles = [tile for tile in tiles if tile != 0]
-        score_add = 0
-        for i in range(len(new_tiles) - 1):
-            if new_tiles[i] == new_tiles[i + 1]:
-                new_tiles[i] *= 2
-                new_tiles[i + 1] = 0
-                score_add += new_tiles[i]
-        new_tiles = [tile for tile in new_tiles if tile != 0]
-        new_tiles += [0] * (SIZE - len(new_tiles))
-        return new_tiles, score_add
-
     def key_handler(self, event):
         key = event.keysym
-        if key == "Up":
-            self.move("up")
-        elif key == "Down":
-            self.move("down")
-        elif key == "Left":
-            self.move("left")
-        elif key == "Right":
-            self.move("right")
+        if key in KEY_DIRECTIONS:
+            self.queue_move(KEY_DIRECTIONS[key])
         elif key == "u":
             self.undo()
+        elif key == "a":
+            self.toggle_auto_play()
+        elif key == "f":
+            self.toggle_frame_stats()
+
+    def queue_move(self, direction):
+        # Held keys repeat faster than Tk repaints, so only the latest key
+        # pressed during a frame is played
+        if self.pending_direction is not None:
+            self.coalesced_keys += 1
+        self.pending_direction = direction
+        if self.frame_timer is None:
+            self.process_pending_move()
+
+    def process_pending_move(self):
+        self.frame_timer = None
+        direction = self.pending_direction
+        if direction is None:
+            return
+        self.pending_direction = None
+        self.move(direction)
+        self.frame_timer = self.root.after(FRAME_INTERVAL, self.process_pending_move)
+
+    def toggle_auto_play(self):
+        self.auto_play = not self.auto_play
+        self.auto_play_button.config(text="Stop Auto Play" if self.auto_play else "Auto Play")
+        if self.auto_play:
+            if self.solver is None:
+                self.solver = Game2048Solver.Solver()
+            if self.auto_timer is None:
+                self.auto_timer = self.root.after(AUTO_PLAY_DELAY, self.auto_step)
+        elif self.auto_timer is not None:
+            self.root.after_cancel(self.auto_timer)
+            self.auto_timer = None
+
+    def auto_step(self):
+        self.auto_timer = None
+        if not self.auto_play:
+            return
+        direction = self.solver.best_move(self.engine.board)
+        if direction is None:
+            self.toggle_auto_play()
+            return
+        self.move(direction)
+        if self.auto_play and self.auto_timer is None:
+            self.auto_timer = self.root.after(AUTO_PLAY_DELAY, self.auto_step)
 
     def is_game_over(self):
-        for i in range(SIZE):
-            for j in range(SIZE):
-                if self.board[i][j] == 0:
-                    return False
-                if i > 0 and self.board[i][j] == self.board[i-1][j]:
-                    return False
-                if i < SIZE-1 and self.board[i][j] == self.board[i+1][j]:
-                    return False
-                if j > 0 and self.board[i][j] == self.board[i][j-1]:
-                    return False
-                if j < SIZE-1 and self.board[i][j] == self.board[i][j+1]:
-                    return False
-        return True
+        return self.engine.is_game_over()
 
     def game_over(self):
         self.save_score()
-        tk.messagebox.showinfo("Game Over", f"Game Over! Your score: {self.score}")
+        messagebox.showinfo("Game Over", f"Game Over! Your score: {self.score}")
         self.reset()
 
-    def save_state(self):
-        self.history.append((self.score, [row[:] for row in self.board]))
+    def save_state(self, score, board):
+        self.history.push(score, board)
 
     def undo(self):
-        if self.history:
-            self.score, self.board = self.history.pop()
+        state = self.history.pop()
+        if state is not None:
+            self.engine.score, self.engine.board = state
             self.update_gui()
 
     def reset(self):
-        self.board = [[0] * SIZE for _ in range(SIZE)]
-        self.score = 0
-        self.history = []
+        self.engine.reset()
+        self.history.clear()
+        self.moves = 0
         self.start_game()
 
     def save_score(self):
-        self.leaderboard.append(f"Score: {self.score}")
-        self.leaderboard = sorted(self.leaderboard, key=lambda x: int(x.split()[1]), reverse=True)[:5]
-        with open("leaderboard.json", "w") as f:
-            json.dump(self.leaderboard, f)
+        self.leaderboard.add(self.score, engine.max_tile(self.engine.board), self.moves)
+        self.leaderboard_label.config(text=self.leaderboard_text())
+
+    def leaderboard_text(self):
+        lines = [f"Score: {entry['score']}" for entry in self.leaderboard.top(LEADERBOARD_SIZE)]
+        return "Leaderboard: \n" + "\n".join(lines)
+
+    def close(self):
+        self.auto_play = False
+        if self.solver is not None:
+            self.solver.close()
+        self.root.destroy()
 
     def load_leaderboard(self):
-        if os.path.exists("leaderboard.json"):
-            with open("leaderboard.json", "r") as f:
-                return json.load(f)
-        return []
+        return Leaderboard()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from ExpenseIndex import LazyExpenses, load_index
+from ExpenseJournal import ExpenseJournal, read_journal
+from ExpenseSummary import month_of
+
+# Columnar expense store for analytics.
+#
+# Keeps every expense as one row across four NumPy columns:
+#   amount       float64
+#   category     int32 code into the categories list
+#   timestamp    int64 seconds since the epoch (UTC midnight of the date),
+#                NO_TIME for undated expenses
+#   description  int32 code into the descriptions list (each distinct text
+#                is stored once)
+# Group-by sums, percentiles, top-N and moving averages run over whole
+# columns. The store is saved next to the snapshot as .npy files that load
+# back memory-mapped, tagged with the journal seq they cover, so opening it
+# only replays the journal records written since.
+
+NO_TIME = np.iinfo(np.int64).min
+SECONDS_PER_DAY = 86400
+INITIAL_CAPACITY = 1024
+COLUMNS = {"amount": np.float64, "category": np.int32, "timestamp": np.int64, "description": np.int32}
+
+
+def columns_path(path):
+    return path + ".columns"
+
+
+# Function to convert "YYYY-MM-DD" dates to timestamps, NO_TIME where missing
+def to_timestamps(days):
+    return np.array([day or "NaT" for day in days], dtype="datetime64[s]").astype(np.int64)
+
+
+# Function to return the timestamp range [start, end) covering months start..end ("YYYY-MM")
+def month_range(start=None, end=None):
+    low = np.datetime64(start, "M").astype("datetime64[s]").astype(np.int64) if start else NO_TIME + 1
+    high = (np.datetime64(end, "M") + 1).astype("datetime64[s]").astype(np.int64) if end else np.iinfo(np.int64).max
+    return low, high
+
+
+class ExpenseColumns:
+    def __init__(self):
+        self.size = 0
+        self.seq = 0
+        self.categories = []
+        self.descriptions = []
+        self.category_codes = {}
+        self.description_codes = {}
+        self.arrays = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+    @property
+    def amount(self):
+        return self.arrays["amount"][:self.size]
+
+    @property
+    def category(self):
+        return self.arrays["category"][:self.size]
+
+    @property
+    def timestamp(self):
+        return self.arrays["timestamp"][:self.size]
+
+    @property
+    def description(self):
+        return self.arrays["description"][:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def _code(self, codes, names, name):
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def _reserve(self, count):
+        needed = self.size + count
+        capacity = len(self.arrays["amount"])
+        # Arrays loaded from disk are read-only maps, so the first append copies them
+        if needed <= capacity and self.arrays["amount"].flags.writeable:
+            return
+        capacity = max(INITIAL_CAPACITY, capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+
+    def extend(self, category, items):
+        """Append a list of expense dicts belonging to one category."""
+        count = len(items)
+        if not count:
+            return
+        self._reserve(count)
+        rows = slice(self.size, self.size + count)
+        self.arrays["amount"][rows] = [item["amount"] for item in items]
+        self.arrays["category"][rows] = self._code(self.category_codes, self.categories, category)
+        self.arrays["timestamp"][rows] = to_timestamps([item.get("date") for item in items])
+        self.arrays["description"][rows] = [self._code(self.description_codes, self.descriptions,
+                                                       item["description"]) for item in items]
+        self.size += count
+
+    def add(self, category, expense):
+        self.extend(category, [expense])
+
+    @classmethod
+    def from_expenses(cls, expenses, seq=0):
+        columns = cls()
+        for category, items in expenses.items():
+            columns.extend(category, items)
+        columns.seq = seq
+        return columns
+
+    # Function to select rows by category name and month range
+    def _select(self, category=None, start=None, end=None):
+        mask = np.ones(self.size, dtype=bool)
+        if category is not None:
+            code = self.category_codes.get(category)
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= self.category == code
+        if start is not None or end is not None:
+            low, high = month_range(start, end)
+            mask &= (self.timestamp >= low) & (self.timestamp < high)
+        return mask
+
+    def sum_by_category(self, start=None, end=None):
+        """Return {category: total} over months start..end (all rows if unbounded)."""
+        mask = self._select(start=start, end=end)
+        sums = np.bincount(self.category[mask], weights=self.amount[mask], minlength=len(self.categories))
+        return {name: float(total) for name, total in zip(self.categories, sums) if total}
+
+    def sum_by_month(self, start=None, end=None):
+        """Return (months, categories, totals) where totals[i, j] is spent in months[i] on categories[j]."""
+        mask = self._select(start=start, end=end) & (self.timestamp != NO_TIME)
+        months = self.timestamp[mask].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        width = len(self.categories)
+        if not len(months):
+            return [], list(self.categories), np.zeros((0, width))
+        first = months.min()
+        count = int(months.max() - first) + 1
+        cells = np.bincount((months - first) * width + self.category[mask], weights=self.amount[mask],
+                            minlength=count * width)
+        labels = np.arange(first, first + count).astype("datetime64[M]")
+        return [str(label) for label in labels], list(self.categories), cells.reshape(count, width)
+
+    def percentiles(self, q=(50, 90, 99), category=None):
+        amounts = self.amount[self._select(category)]
+        if not len(amounts):
+            return {}
+        return dict(zip(q, np.percentile(amounts, q).tolist()))
+
+    def top(self, n=10, category=None, start=None, end=None):
+        """Return the n largest expenses as (amount, category, date, description), largest first."""
+        rows = np.flatnonzero(self._select(category, start, end))
+        if len(rows) > n:
+            rows = rows[np.argpartition(self.amount[rows], -n)[-n:]]
+        rows = rows[np.argsort(self.amount[rows])[::-1]]
+        return [(float(self.amount[row]), self.categories[self.category[row]], self._date(row),
+                 self.descriptions[self.description[row]]) for row in rows]
+
+    def _date(self, row):
+        timestamp = self.timestamp[row]
+        return None if timestamp == NO_TIME else str(timestamp.astype("datetime64[s]").astype("datetime64[D]"))
+
+    def moving_average(self, window=30, category=None):
+        """Return (first_day, averages): the mean daily spend over each window-day span.
+
+        averages[i] covers the window days ending window - 1 + i days after first_day.
+        """
+        mask = self._select(category) & (self.timestamp != NO_TIME)
+        days = self.timestamp[mask] // SECONDS_PER_DAY
+        if not len(days):
+            return None, np.empty(0)
+        first = days.min()
+        daily = np.bincount(days - first, weights=self.amount[mask])
+        if len(daily) < window:
+            return np.datetime64(int(first), "D"), np.empty(0)
+        running = np.concatenate(([0.0], np.cumsum(daily)))
+        return np.datetime64(int(first), "D"), (running[window:] - running[:-window]) / window
+
+    def save(self, path):
+        """Write the columns under path (a directory); meta.json is replaced last."""
+        os.makedirs(path, exist_ok=True)
+        for name in COLUMNS:
+            tmp_path = os.path.join(path, name + ".tmp.npy")
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, os.path.join(path, name + ".npy"))
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump({"rows": self.size, "seq": self.seq, "categories": self.categories,
+                       "descriptions": self.descriptions}, file)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read columns saved by save(); None if they are missing or incomplete."""
+        try:
+            with open(os.path.join(path, "meta.json"), 'r') as file:
+                meta = json.load(file)
+            arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+                      for name in COLUMNS}
+        except (OSError, ValueError):
+            return None
+        if any(len(array) != meta["rows"] for array in arrays.values()):
+            return None
+        columns = cls()
+        columns.arrays = arrays
+        columns.size = meta["rows"]
+        columns.seq = meta["seq"]
+        columns.categories = meta["categories"]
+        columns.descriptions = meta["descriptions"]
+        columns.category_codes = {name: code for code, name in enumerate(columns.categories)}
+        columns.description_codes = {text: code for code, text in enumerate(columns.descriptions)}
+        return columns
+
+
+# Function to open the column store for an expense file, catching up with its journal
+# (the caller must keep compaction from running meanwhile; see ExpenseJournal.wait_for_compaction)
+def load_columns(file_path):
+    journal = ExpenseJournal(file_path)
+    columns = ExpenseColumns.load(columns_path(file_path))
+    index = load_index(file_path)
+    if columns is None or columns.seq < index["seq"]:
+        # Missing, or older than the snapshot (the records it lacks were compacted away)
+        columns = ExpenseColumns()
+        with LazyExpenses(file_path, index) as expenses:
+            for category in list(expenses):
+                columns.extend(category, expenses[category])
+        columns.seq = index["seq"]
+        columns.save(columns_path(file_path))
+    for source in (journal.rotated_path, journal.journal_path):
+        for record in read_journal(source):
+            if record["seq"] > columns.seq:
+                expense = {"amount": record["amount"], "description": record["description"]}
+                if "date" in record:
+                    expense["date"] = record["date"]
+                columns.add(record["category"], expense)
+                columns.seq = record["seq"]
+    return columns
+
+
+# Function to print the analytics summary for a column store
+def print_report(columns, top_n=5, window=30):
+    print(f"{len(columns)} expenses in {len(columns.categories)} categories")
+    for category, total in sorted(columns.sum_by_category().items(), key=lambda item: -item[1]):
+        print(f"  {category}: ${total:.2f}")
+    percentiles = columns.percentiles()
+    if percentiles:
+        print("Amount percentiles: " + ", ".join(f"p{q} ${value:.2f}" for q, value in percentiles.items()))
+    print(f"Top {top_n} expenses:")
+    for amount, category, day, description in columns.top(top_n):
+        print(f"  ${amount:.2f} {category} {day or 'undated'} {description}")
+    first_day, averages = columns.moving_average(window)
+    if len(averages):
+        last_day = first_day + window - 1 + len(averages) - 1
+        print(f"{window}-day average daily spend ending {last_day}: ${averages[-1]:.2f}")
+
+
+# Function to compare the column store against lists of dicts on synthetic data
+def benchmark(rows=1000000, categories=50, seed=1):
+    rng = np.random.default_rng(seed)
+    names = [f"category{i}" for i in range(categories)]
+    codes = rng.integers(0, categories, rows)
+    amounts = np.round(rng.gamma(2.0, 20.0, rows), 2)
+    days = np.datetime64("2020-01-01") + rng.integers(0, 5 * 365, rows)
+    dates = days.astype(str).tolist()
+    descriptions = [f"merchant {i}" for i in rng.integers(0, 2000, rows)]
+
+    tracemalloc.start()
+    expenses = {name: [] for name in names}
+    for code, amount, day, description in zip(codes.tolist(), amounts.tolist(), dates, descriptions):
+        expenses[names[code]].append({"amount": amount, "description": description, "date": day})
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    columns = ExpenseColumns.from_expenses(expenses)
+    column_bytes = sum(array.nbytes for array in (columns.amount, columns.category,
+                                                  columns.timestamp, columns.description))
+    print(f"{rows} expenses: lists of dicts {dict_bytes / 2 ** 20:.1f} MiB, "
+          f"columns {column_bytes / 2 ** 20:.1f} MiB (+{len(columns.descriptions)} distinct descriptions)")
+
+    def timed(label, func, repeat=3):
+        best = min(_elapsed(func) for _ in range(repeat))
+        print(f"  {label:<34} {best * 1000:9.1f} ms")
+
+    print("Group-by sum by category:")
+    timed("lists of dicts", lambda: {name: sum(item["amount"] for item in items) for name, items in expenses.items()})
+    timed("columns", columns.sum_by_category)
+    print("Sum by (month, category):")
+    timed("lists of dicts", lambda: _month_sums(expenses))
+    timed("columns", columns.sum_by_month)
+    print("Other column queries:")
+    timed("p50/p90/p99", columns.percentiles)
+    timed("top 10", columns.top)
+    timed("30-day moving average", columns.moving_average)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "columns")
+        timed("save", lambda: columns.save(path), repeat=1)
+        timed("load (memory-mapped)", lambda: ExpenseColumns.load(path))
+        loaded = ExpenseColumns.load(path)
+        assert loaded.sum_by_category() == columns.sum_by_category()
+        del loaded
+
+
+def _month_sums(expenses):
+    sums = {}
+    for category, items in expenses.items():
+        for item in items:
+            key = (month_of(item), category)
+            sums[key] = sums.get(key, 0.0) + item["amount"]
+    return sums
+
+
+def _elapsed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar expense analytics.")
+    parser.add_argument("--file", default="expenses.json", help="expense snapshot file")
+    parser.add_argument("--top", type=int, default=5, help="largest expenses to list")
+    parser.add_argument("--window", type=int, default=30, help="moving average window in days")
+    parser.add_argument("--benchmark", action="store_true", help="compare against lists of dicts")
+    parser.add_argument("--rows", type=int, default=1000000, help="synthetic expenses for --benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.rows)
+    else:
+        columns = load_columns(args.file)
+        print_report(columns, args.top, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import json
+import mmap
+import os
+import re
+from collections.abc import MutableMapping
+
+from ExpenseSummary import MonthlyTotals, month_totals
+
+# Per-category offset index for expense snapshots.
+#
+# A snapshot stores each category's expenses as one contiguous JSON list. The
+# sidecar expenses.json.index records, for every category, the byte range of
+# that list together with its count, total and per-month totals, plus the
+# size and mtime of the snapshot it describes. With it, LazyExpenses can open
+# a snapshot of any size by reading only the index and memory-mapping the
+# file, and parse a category's list the first time it is asked for. A
+# snapshot without a current index (an old file, or a crash before the index
+# was written) is scanned once with a tokenizer that never holds more than
+# one category in memory, and the index is saved for next time.
+
+INDEX_VERSION = 2
+
+# Strings (with escapes) or brackets; everything else in JSON is skipped over
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+_SEQ = re.compile(rb'"seq":\s*(\d+)')
+
+
+def index_path(path):
+    return path + ".index"
+
+
+# Function to describe one category list for the index
+def category_entry(start, end, items):
+    return [start, end, len(items), sum(item["amount"] for item in items), month_totals(items)]
+
+
+# Function to find each category's list in a snapshot, returning {category: [start, end, count, total, months]}
+def scan_snapshot(data):
+    categories = {}
+    depth = 0
+    base = 1
+    key = None
+    start = None
+    for match in _TOKEN.finditer(data):
+        token = data[match.start()]
+        if token == 0x22:  # '"'
+            if start is None:
+                key = match.group()
+            continue
+        if token in b"[{":
+            depth += 1
+            if start is None:
+                if depth == 2 and token == 0x7b and key == b'"expenses"':
+                    base = 2
+                elif depth == base + 1 and token == 0x5b:
+                    start = match.start()
+        else:
+            if start is not None and depth == base + 1 and token == 0x5d:
+                categories[json.loads(key)] = category_entry(start, match.end(),
+                                                             json.loads(data[start:match.end()]))
+                start = None
+            depth -= 1
+    return categories
+
+
+def write_index(path, categories, seq):
+    stat = os.stat(path)
+    tmp_path = index_path(path) + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                   "seq": seq, "categories": categories}, file)
+    os.replace(tmp_path, index_path(path))
+
+
+# Function to return the index for a snapshot, rebuilding it if it is missing or stale
+def load_index(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return {"seq": 0, "categories": {}}
+    stat = os.stat(path)
+    try:
+        with open(index_path(path), 'r') as file:
+            index = json.load(file)
+        if (index.get("version") == INDEX_VERSION and index["size"] == stat.st_size
+                and index["mtime_ns"] == stat.st_mtime_ns):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        categories = scan_snapshot(data)
+        seq = _SEQ.search(data, 0, 256)
+    seq = int(seq.group(1)) if seq else 0
+    write_index(path, categories, seq)
+    return load_index(path)
+
+
+class LazyExpenses(MutableMapping):
+    """Category -> list of expenses, parsed from a snapshot on first access.
+
+    Behaves like defaultdict(list): a missing category reads as an empty
+    list. overlay holds expenses newer than the snapshot (replayed from the
+    journal) and is appended to a category when it is materialized. monthly
+    is kept up to date from the index, the overlay and every add().
+    """
+
+    def __init__(self, path, index, overlay=None):
+        self.index = index["categories"]
+        self.overlay = overlay or {}
+        self.loaded = {}
+        self.data = None
+        self.monthly = MonthlyTotals()
+        for category, entry in self.index.items():
+            self.monthly.add_months(category, entry[4])
+        for category, items in self.overlay.items():
+            self.monthly.add_items(category, items)
+        if self.index:
+            with open(path, 'rb') as file:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _materialize(self, category):
+        items = []
+        if category in self.index:
+            start, end = self.index[category][:2]
+            items = json.loads(self.data[start:end])
+        items.extend(self.overlay.pop(category, ()))
+        self.loaded[category] = items
+        return items
+
+    def __getitem__(self, category):
+        if category in self.loaded:
+            return self.loaded[category]
+        return self._materialize(category)
+
+    def __setitem__(self, category, items):
+        self.overlay.pop(category, None)
+        self.loaded[category] = items
+        self.monthly.discard(category)
+        self.monthly.add_items(category, items)
+
+    def __delitem__(self, category):
+        if category not in self:
+            raise KeyError(category)
+        self.index = {name: entry for name, entry in self.index.items() if name != category}
+        self.overlay.pop(category, None)
+        self.loaded.pop(category, None)
+        self.monthly.discard(category)
+
+    def __contains__(self, category):
+        return category in self.loaded or category in self.index or category in self.overlay
+
+    def __iter__(self):
+        seen = set()
+        for source in (self.index, self.overlay, self.loaded):
+            for category in list(source):
+                if category not in seen:
+                    seen.add(category)
+                    yield category
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, category, default=None):
+        return self[category] if category in self else default
+
+    def add(self, category, expense):
+        """Record an expense without materializing its category."""
+        self.monthly.add(category, expense)
+        if category in self.loaded:
+            self.loaded[category].append(expense)
+        else:
+            self.overlay.setdefault(category, []).append(expense)
+
+    def is_loaded(self, category):
+        return category in self.loaded
+
+    def totals(self):
+        """Return {category: total amount} without materializing anything."""
+        totals = self.monthly.by_category()
+        return {category: totals.get(category, 0.0) for category in self}
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,341 @@
+import argparse
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from ExpenseIndex import LazyExpenses, load_index, write_index
+from ExpenseSummary import month_totals
+
+# Append-only journal storage for the expense tracker.
+#
+# State lives in two files next to each other:
+#   expenses.json          snapshot {"version": 2, "seq": N, "expenses": {...}}
+#   expenses.json.journal  one JSON record per line, each with its own seq
+# Adding an expense appends one line, so saving costs the same however long
+# the history is. Loading reads the snapshot and replays journal records
+# newer than it. Compaction renames the journal aside, starts a fresh one and
+# folds the old one into a new snapshot on a background thread, so the
+# journal never grows without bound. A snapshot written by an older version
+# (a plain category -> list dict) loads as seq 0.
+#
+# Every snapshot is written with a per-category offset index (see
+# ExpenseIndex), which lets load(lazy=True) open it without parsing it, and
+# lets compaction copy untouched categories across byte for byte.
+
+SNAPSHOT_VERSION = 2
+SYNC_EVERY = 64         # records between fsyncs
+SYNC_INTERVAL = 1.0     # or seconds since the last fsync, whichever comes first
+COMPACT_EVERY = 100000  # journal records before compacting into the snapshot
+
+# The process umask, read once at import (os.umask can only be read by setting
+# it, which is not safe once the compactor thread runs)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+# Function to read a snapshot, returning (expenses, seq)
+def read_snapshot(path):
+    expenses = defaultdict(list)
+    if not os.path.exists(path):
+        return expenses, 0
+    with open(path, 'r') as file:
+        data = json.load(file)
+    if data.get("version") == SNAPSHOT_VERSION and "expenses" in data:
+        expenses.update(data["expenses"])
+        return expenses, data["seq"]
+    expenses.update(data)
+    return expenses, 0
+
+
+# Function to write a snapshot atomically from (category, json_list_bytes, count, total, months) parts
+def write_snapshot_parts(path, parts, seq):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".expenses-", suffix=".tmp")
+    categories = {}
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(b'{"version": %d, "seq": %d, "expenses": {' % (SNAPSHOT_VERSION, seq))
+            for category, items, count, total, months in parts:
+                if categories:
+                    file.write(b", ")
+                file.write(json.dumps(category).encode() + b": ")
+                start = file.tell()
+                file.write(items)
+                categories[category] = [start, file.tell(), count, total, months]
+            file.write(b"}}")
+            file.flush()
+            os.fsync(file.fileno())
+        # mkstemp creates the file 0600; keep the mode of the snapshot it replaces
+        if os.path.exists(path):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    write_index(path, categories, seq)
+
+
+# Function to write a snapshot of an in-memory expenses mapping
+def write_snapshot(path, expenses, seq):
+    write_snapshot_parts(path, ((category, json.dumps(items).encode(), len(items),
+                                 sum(item["amount"] for item in items), month_totals(items))
+                                for category, items in expenses.items()), seq)
+
+
+# Function to yield the records of a journal file; a torn last line from a crash is ignored
+def read_journal(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as file:
+        for line in file:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+# Function to apply journal records newer than seq, returning the last seq applied
+def replay(expenses, path, seq):
+    for record in read_journal(path):
+        if record["seq"] > seq:
+            expense = {"amount": record["amount"], "description": record["description"]}
+            if "date" in record:
+                expense["date"] = record["date"]
+            expenses[record["category"]].append(expense)
+            seq = record["seq"]
+    return seq
+
+
+class ExpenseJournal:
+    def __init__(self, path="expenses.json", sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL,
+                 compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.rotated_path = path + ".journal.old"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self.seq = 0
+        self.records = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.file = None
+        self.compactor = None
+        self.lock = threading.Lock()
+
+    def load(self, lazy=False):
+        """Return the expenses and open the journal for appending.
+
+        The result is a defaultdict(list), or with lazy=True a LazyExpenses
+        that parses each category from the snapshot only when it is used.
+        """
+        self.wait_for_compaction()
+        if lazy:
+            index = load_index(self.path)
+            self.seq = index["seq"]
+            expenses = defaultdict(list)
+        else:
+            expenses, self.seq = read_snapshot(self.path)
+        snapshot_seq = self.seq
+        self.seq = replay(expenses, self.rotated_path, self.seq)
+        self.seq = replay(expenses, self.journal_path, self.seq)
+        self.records = self.seq - snapshot_seq
+        self._open()
+        if lazy:
+            expenses = LazyExpenses(self.path, index, dict(expenses))
+        if os.path.exists(self.rotated_path) or self.records >= self.compact_every:
+            self.compact()
+        return expenses
+
+    def _open(self):
+        if self.file is None:
+            # Drop a torn tail so new records start on a fresh line
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb+') as file:
+                    data = file.read()
+                    if data and not data.endswith(b"\n"):
+                        file.truncate(data.rfind(b"\n") + 1)
+            self.file = open(self.journal_path, 'a')
+
+    def append(self, category, amount, description, day=None):
+        """Journal one expense (day is its "YYYY-MM-DD" date); it is flushed
+        to the OS now and fsynced in batches."""
+        record = {"seq": 0, "category": category, "amount": amount, "description": description}
+        if day is not None:
+            record["date"] = day
+        with self.lock:
+            self._open()
+            self.seq += 1
+            record["seq"] = self.seq
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+            self.records += 1
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                self._sync()
+        if self.records >= self.compact_every:
+            self.compact()
+
+    def append_many(self, records):
+        """Journal (category, amount, description, day) tuples in one write and one fsync."""
+        lines = []
+        with self.lock:
+            self._open()
+            for category, amount, description, day in records:
+                self.seq += 1
+                record = {"seq": self.seq, "category": category, "amount": amount, "description": description}
+                if day is not None:
+                    record["date"] = day
+                lines.append(json.dumps(record))
+            if lines:
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+                self.records += len(lines)
+                self.unsynced += len(lines)
+                self._sync()
+        if self.records >= self.compact_every:
+            self.compact()
+        return len(lines)
+
+    def _sync(self):
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def sync(self):
+        with self.lock:
+            if self.file is not None:
+                self._sync()
+
+    def compact(self):
+        """Start folding the journal into the snapshot on a background thread."""
+        if self.compactor is not None and self.compactor.is_alive():
+            return
+        with self.lock:
+            if not os.path.exists(self.rotated_path):
+                self._sync()
+                self.file.close()
+                os.replace(self.journal_path, self.rotated_path)
+                self.file = open(self.journal_path, 'a')
+                self.records = 0
+        self.compactor = threading.Thread(target=self._compact, name="expense-compactor", daemon=True)
+        self.compactor.start()
+
+    def _compact(self):
+        # Only the rotated journal is held in memory; snapshot lists are
+        # copied as bytes, with new records spliced onto the end
+        index = load_index(self.path)
+        added = defaultdict(list)
+        seq = replay(added, self.rotated_path, index["seq"])
+        with LazyExpenses(self.path, index) as old:
+            write_snapshot_parts(self.path, self._merged(old, added), seq)
+        os.unlink(self.rotated_path)
+
+    def _merged(self, old, added):
+        for category, (start, end, count, total, months) in old.index.items():
+            items = old.data[start:end]
+            extra = added.pop(category, None)
+            if extra:
+                tail = json.dumps(extra).encode()
+                items = items[:-1] + b", " + tail[1:] if count else tail
+                count += len(extra)
+                total += sum(item["amount"] for item in extra)
+                for month, (extra_count, extra_total) in month_totals(extra).items():
+                    cell = months.setdefault(month, [0, 0.0])
+                    cell[0] += extra_count
+                    cell[1] += extra_total
+            yield category, items, count, total, months
+        for category, extra in added.items():
+            yield (category, json.dumps(extra).encode(), len(extra),
+                   sum(item["amount"] for item in extra), month_totals(extra))
+
+    def wait_for_compaction(self):
+        """Block until a background compaction, if any, has finished.
+
+        Readers of the snapshot, index or journal files other than this
+        object must call this first: compaction replaces and unlinks them.
+        """
+        if self.compactor is not None:
+            self.compactor.join()
+            self.compactor = None
+
+    def close(self):
+        self.sync()
+        self.wait_for_compaction()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# Function to time appends as the history grows, against rewriting the whole file
+def benchmark(total=1000000, step=250000, samples=1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "expenses.json")
+        journal = ExpenseJournal(path, compact_every=total + samples + 1)
+        expenses = journal.load()
+        categories = [f"category{i}" for i in range(20)]
+        for size in range(step, total + 1, step):
+            while journal.seq < size - samples:
+                category = categories[journal.seq % len(categories)]
+                journal.append(category, 12.5, "groceries")
+                expenses[category].append({"amount": 12.5, "description": "groceries"})
+            start = time.perf_counter()
+            for _ in range(samples):
+                journal.append("food", 12.5, "lunch")
+            append_us = (time.perf_counter() - start) / samples * 1e6
+            expenses["food"].extend({"amount": 12.5, "description": "lunch"} for _ in range(samples))
+            start = time.perf_counter()
+            with open(os.path.join(tmp, "full.json"), 'w') as file:
+                json.dump(expenses, file)
+            rewrite_ms = (time.perf_counter() - start) * 1000
+            print(f"{size:>9} expenses: journal append {append_us:7.1f} us   full rewrite {rewrite_ms:8.1f} ms")
+        start = time.perf_counter()
+        journal.compact()
+        journal.close()
+        print(f"Compaction of {total} records: {time.perf_counter() - start:.2f}s (background)")
+        del expenses
+        for lazy in (False, True):
+            tracemalloc.start()
+            start = time.perf_counter()
+            reloaded = ExpenseJournal(path)
+            expenses = reloaded.load(lazy)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            reloaded.close()
+            mode = "lazy" if lazy else "full"
+            print(f"Reload ({mode}): {seconds * 1000:8.1f} ms, peak {peak / 2 ** 20:7.1f} MiB, "
+                  f"{len(expenses)} categories")
+            del expenses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expense journal maintenance and benchmark.")
+    parser.add_argument("--file", default="expenses.json", help="expense snapshot file")
+    parser.add_argument("--compact", action="store_true", help="fold the journal into the snapshot and exit")
+    parser.add_argument("--benchmark", action="store_true", help="time appends as the history grows")
+    parser.add_argument("--total", type=int, default=1000000, help="history size for --benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.total, max(1, args.total // 4))
+    elif args.compact:
+        journal = ExpenseJournal(args.file)
+        journal.load()
+        journal.compact()
+        journal.close()
+        print(f"Compacted {args.file} at seq {journal.seq}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
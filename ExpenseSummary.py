@@ -0,0 +1,101 @@
+from datetime import date
+
+# Running (month, category) totals for the expense tracker.
+#
+# Each cell holds [count, total] for one category in one "YYYY-MM" month.
+# Adding an expense touches one cell, and summaries over any month range are
+# answered from the cells (months x categories) without looking at the
+# expenses themselves. Expenses saved before dates were recorded fall in the
+# UNDATED month, which ranges never include.
+
+UNDATED = "undated"
+
+
+# Function to return the "YYYY-MM" month an expense belongs to
+def month_of(expense):
+    day = expense.get("date")
+    return day[:7] if day else UNDATED
+
+
+# Function to step a "YYYY-MM" month by a number of months
+def shift_month(month, months):
+    year, number = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{number + 1:02d}"
+
+
+# Function to group a list of expenses into {month: [count, total]}
+def month_totals(items):
+    months = {}
+    for expense in items:
+        cell = months.setdefault(month_of(expense), [0, 0.0])
+        cell[0] += 1
+        cell[1] += expense["amount"]
+    return months
+
+
+class MonthlyTotals:
+    def __init__(self):
+        self.cells = {}
+
+    @classmethod
+    def from_expenses(cls, expenses):
+        totals = cls()
+        for category, items in expenses.items():
+            totals.add_items(category, items)
+        return totals
+
+    def add(self, category, expense):
+        cell = self.cells.get((month_of(expense), category))
+        if cell is None:
+            self.cells[month_of(expense), category] = [1, expense["amount"]]
+        else:
+            cell[0] += 1
+            cell[1] += expense["amount"]
+
+    def add_items(self, category, items):
+        self.add_months(category, month_totals(items))
+
+    def add_months(self, category, months):
+        for month, (count, total) in months.items():
+            cell = self.cells.setdefault((month, category), [0, 0.0])
+            cell[0] += count
+            cell[1] += total
+
+    def discard(self, category):
+        self.cells = {key: cell for key, cell in self.cells.items() if key[1] != category}
+
+    def months(self):
+        return sorted({month for month, _ in self.cells if month != UNDATED})
+
+    def by_category(self, start=None, end=None):
+        """Return {category: total} over months start..end ("YYYY-MM", inclusive).
+
+        With neither bound every expense counts, undated ones included.
+        """
+        totals = {}
+        for (month, category), (_, total) in self.cells.items():
+            if start is not None or end is not None:
+                if month == UNDATED or (start is not None and month < start) or (end is not None and month > end):
+                    continue
+            totals[category] = totals.get(category, 0.0) + total
+        return totals
+
+    def month(self, month):
+        return self.by_category(month, month)
+
+    def last_months(self, months=6, today=None):
+        """Return {category: total} over the last months months, this one included."""
+        current = (today or date.today()).strftime('%Y-%m')
+        return self.by_category(shift_month(current, 1 - months), current)
+
+    def by_month(self, start, end):
+        """Return {month: {category: total}} for every month in start..end."""
+        table = {}
+        month = start
+        while month <= end:
+            table[month] = {}
+            month = shift_month(month, 1)
+        for (month, category), (_, total) in self.cells.items():
+            if month in table:
+                table[month][category] = total
+        return table
@@ -1,65 +1,140 @@
-import json
 import os
-from collections import defaultdict
+from datetime import date, datetime
 
-# Function to load expense data from file
-def load_expenses(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as file:
-            return json.load(file)
-    else:
-        return defaultdict(list)
+from ExpenseColumns import load_columns, print_report
+from ExpenseIndex import LazyExpenses
+from ExpenseJournal import ExpenseJournal, write_snapshot
+from ExpenseSummary import MonthlyTotals, shift_month
+
+RECENT_MONTHS = 6
+
+# Function to load expense data from file, replaying its journal
+# (lazy=True parses each category only when it is first viewed)
+def load_expenses(file_path, lazy=False):
+    journal = ExpenseJournal(file_path)
+    expenses = journal.load(lazy)
+    journal.close()
+    return expenses
 
-# Function to save expense data to file
-def save_expenses(expenses, file_path):
-    with open(file_path, 'w') as file:
-        json.dump(expenses, file)
+# Function to save expense data to file as a full snapshot, replacing its journal
+def save_expenses(expenses, file_path, seq=0):
+    write_snapshot(file_path, expenses, seq)
+    for path in (file_path + ".journal", file_path + ".journal.old"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+# Function to get the running (month, category) totals for the expenses
+def monthly_totals(expenses):
+    if isinstance(expenses, LazyExpenses):
+        return expenses.monthly
+    return MonthlyTotals.from_expenses(expenses)
+
+# Function to ask for an expense date, defaulting to today
+def input_date():
+    while True:
+        text = input("Enter expense date (YYYY-MM-DD, blank for today): ").strip()
+        if not text:
+            return date.today().strftime('%Y-%m-%d')
+        try:
+            return datetime.strptime(text, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            print("Invalid date. Please try again.")
 
 # Function to add a new expense
-def add_expense(expenses):
+def add_expense(expenses, journal=None, totals=None):
     category = input("Enter expense category: ")
     amount = float(input("Enter expense amount: "))
     description = input("Enter expense description: ")
-    expenses[category].append({"amount": amount, "description": description})
+    day = input_date()
+    expense = {"amount": amount, "description": description, "date": day}
+    if isinstance(expenses, LazyExpenses):
+        expenses.add(category, expense)
+    else:
+        expenses[category].append(expense)
+        if totals is not None:
+            totals.add(category, expense)
+    if journal is not None:
+        journal.append(category, amount, description, day)
     print("Expense added successfully!")
 
 # Function to view monthly expense summary
-def view_monthly_summary(expenses):
-    for category, category_expenses in expenses.items():
-        total_amount = sum(expense['amount'] for expense in category_expenses)
+def view_monthly_summary(expenses, totals=None):
+    totals = totals or monthly_totals(expenses)
+    month = date.today().strftime('%Y-%m')
+    month_totals = totals.month(month)
+    if not month_totals:
+        print(f"No expenses recorded for {month}.")
+        return
+    print(f"Summary for {month}:")
+    for category, total_amount in sorted(month_totals.items()):
         print(f"{category}: ${total_amount:.2f}")
+    print(f"Total: ${sum(month_totals.values()):.2f}")
+
+# Function to view spending by category over the last few months
+def view_recent_months(expenses, totals=None, months=RECENT_MONTHS):
+    totals = totals or monthly_totals(expenses)
+    end = date.today().strftime('%Y-%m')
+    start = shift_month(end, 1 - months)
+    by_month = totals.by_month(start, end)
+    categories = sorted({category for month_totals in by_month.values() for category in month_totals})
+    if not categories:
+        print(f"No expenses recorded from {start} to {end}.")
+        return
+    print(f"Last {months} months by category ({start} to {end}):")
+    print("Category".ljust(16) + "".join(month.rjust(11) for month in by_month) + "Total".rjust(12))
+    for category in categories:
+        amounts = [by_month[month].get(category, 0.0) for month in by_month]
+        print(category[:15].ljust(16) + "".join(f"{amount:11.2f}" for amount in amounts) + f"{sum(amounts):12.2f}")
 
 # Function to view category-wise expenditure
 def view_category_expenditure(expenses):
     category = input("Enter category to view expenditure: ")
     if category in expenses:
         for expense in expenses[category]:
-            print(f"Amount: ${expense['amount']:.2f}, Description: {expense['description']}")
+            day = expense.get('date', 'undated')
+            print(f"Date: {day}, Amount: ${expense['amount']:.2f}, Description: {expense['description']}")
     else:
         print("No expenses found for this category.")
 
+# Function to view spending analytics from the columnar store
+def view_analytics(file_path, journal=None):
+    if journal is not None:
+        # Compaction swaps the snapshot and removes the rotated journal, so
+        # it must not run while the columns catch up from them
+        journal.sync()
+        journal.wait_for_compaction()
+    print_report(load_columns(file_path))
+
 # Main function
 def main():
     file_path = "expenses.json"
-    expenses = load_expenses(file_path)
+    journal = ExpenseJournal(file_path)
+    expenses = journal.load(lazy=True)
+    totals = monthly_totals(expenses)
 
     while True:
         print("\nExpense Tracker Menu:")
         print("1. Add Expense")
         print("2. View Monthly Summary")
         print("3. View Category-wise Expenditure")
-        print("4. Exit")
+        print(f"4. View Last {RECENT_MONTHS} Months by Category")
+        print("5. View Spending Analytics")
+        print("6. Exit")
 
         choice = input("Enter your choice: ")
 
         if choice == '1':
-            add_expense(expenses)
+            add_expense(expenses, journal, totals)
         elif choice == '2':
-            view_monthly_summary(expenses)
+            view_monthly_summary(expenses, totals)
         elif choice == '3':
             view_category_expenditure(expenses)
         elif choice == '4':
-            save_expenses(expenses, file_path)
+            view_recent_months(expenses, totals)
+        elif choice == '5':
+            view_analytics(file_path, journal)
+        elif choice == '6':
+            journal.close()
             print("Exiting... Thank you!")
             break
         else:
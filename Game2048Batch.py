@@ -0,0 +1,203 @@
+import argparse
+import time
+
+import numpy as np
+
+import Game2048Engine as engine
+
+# Vectorized batch simulator for 2048.
+#
+# Holds N packed boards (the same 64-bit layout as Game2048Engine) in a uint64
+# array and applies moves, merges, scoring, tile spawns and game-over checks to
+# the whole batch at once using the engine's row tables as NumPy lookups.
+
+DIRECTIONS = engine.DIRECTIONS
+DEFAULT_BATCH_SIZE = 10000
+
+_ROW_LEFT = np.array(engine.ROW_LEFT, dtype=np.uint64)
+_ROW_RIGHT = np.array(engine.ROW_RIGHT, dtype=np.uint64)
+_ROW_LEFT_SCORE = np.array(engine.ROW_LEFT_SCORE, dtype=np.int64)
+_ROW_RIGHT_SCORE = np.array(engine.ROW_RIGHT_SCORE, dtype=np.int64)
+_ROW_SHIFTS = [np.uint64(shift) for shift in (0, 16, 32, 48)]
+_CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+_ROW_MASK = np.uint64(engine.ROW_MASK)
+_CELL_MASK = np.uint64(engine.CELL_MASK)
+_SPAWN_EXPONENTS = np.array(engine.SPAWN_EXPONENTS, dtype=np.uint64)
+
+
+# Function to transpose every board in the batch
+def transpose(boards):
+    a1 = boards & np.uint64(0xF0F00F0FF0F00F0F)
+    a2 = boards & np.uint64(0x0000F0F00000F0F0)
+    a3 = boards & np.uint64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << np.uint64(12)) | (a3 >> np.uint64(12))
+    b1 = a & np.uint64(0xFF00FF0000FF00FF)
+    b2 = a & np.uint64(0x00FF00FF00000000)
+    b3 = a & np.uint64(0x00000000FF00FF00)
+    return b1 | (b2 >> np.uint64(24)) | (b3 << np.uint64(24))
+
+
+def _move_rows(boards, table, score_table):
+    result = np.zeros_like(boards)
+    score = np.zeros(boards.shape, dtype=np.int64)
+    for shift in _ROW_SHIFTS:
+        rows = ((boards >> shift) & _ROW_MASK).astype(np.intp)
+        result |= table[rows] << shift
+        score += score_table[rows]
+    return result, score
+
+
+# Function to apply one direction to every board, returning (boards, scores gained)
+def move(boards, direction):
+    if direction == "left":
+        return _move_rows(boards, _ROW_LEFT, _ROW_LEFT_SCORE)
+    if direction == "right":
+        return _move_rows(boards, _ROW_RIGHT, _ROW_RIGHT_SCORE)
+    transposed = transpose(boards)
+    if direction == "up":
+        result, score = _move_rows(transposed, _ROW_LEFT, _ROW_LEFT_SCORE)
+    else:
+        result, score = _move_rows(transposed, _ROW_RIGHT, _ROW_RIGHT_SCORE)
+    return transpose(result), score
+
+
+# Function to compute all four moves at once: (N, 4) boards and scores
+def all_moves(boards):
+    results = np.empty((boards.shape[0], len(DIRECTIONS)), dtype=np.uint64)
+    scores = np.empty((boards.shape[0], len(DIRECTIONS)), dtype=np.int64)
+    for d, direction in enumerate(DIRECTIONS):
+        results[:, d], scores[:, d] = move(boards, direction)
+    return results, scores
+
+
+# Function to unpack the batch into an (N, 16) array of exponents
+def cells(boards):
+    return ((boards[:, None] >> _CELL_SHIFTS) & _CELL_MASK).astype(np.uint8)
+
+
+# Function to place a random tile on a random empty cell of each board
+def spawn_tiles(boards, rng):
+    empty = cells(boards) == 0
+    has_empty = empty.any(axis=1)
+    keys = rng.random(empty.shape)
+    keys[~empty] = -1.0
+    index = keys.argmax(axis=1).astype(np.uint64)
+    exponent = _SPAWN_EXPONENTS[rng.integers(0, len(_SPAWN_EXPONENTS), size=boards.shape[0])]
+    tiles = np.where(has_empty, exponent << (index * np.uint64(4)), np.uint64(0))
+    return boards | tiles
+
+
+def max_exponents(boards):
+    return cells(boards).max(axis=1)
+
+
+# Policy that picks a uniformly random legal move for each board
+def random_policy(boards, legal, rng):
+    keys = rng.random(legal.shape)
+    keys[~legal] = -1.0
+    return keys.argmax(axis=1)
+
+
+class BatchSimulator:
+    """Plays a batch of games in lock-step until every board is stuck.
+
+    The policy is called as policy(boards, legal, rng) with the live boards and
+    an (N, 4) mask of legal moves in DIRECTIONS order, and returns one
+    direction index per board. Illegal choices fall back to the first legal
+    move so a bad policy cannot stall the batch.
+    """
+
+    def __init__(self, policy=random_policy, seed=None):
+        self.policy = policy
+        self.rng = np.random.default_rng(seed)
+
+    def play(self, num_games):
+        rng = self.rng
+        boards = np.zeros(num_games, dtype=np.uint64)
+        boards = spawn_tiles(spawn_tiles(boards, rng), rng)
+        scores = np.zeros(num_games, dtype=np.int64)
+        moves = np.zeros(num_games, dtype=np.int64)
+        alive = np.arange(num_games)
+
+        while alive.size:
+            live = boards[alive]
+            results, gained = all_moves(live)
+            legal = results != live[:, None]
+            playable = legal.any(axis=1)
+            alive, live = alive[playable], live[playable]
+            results, gained, legal = results[playable], gained[playable], legal[playable]
+            if not alive.size:
+                break
+
+            choice = np.asarray(self.policy(live, legal, rng), dtype=np.intp)
+            rows = np.arange(alive.size)
+            illegal = ~legal[rows, choice]
+            choice[illegal] = legal[illegal].argmax(axis=1)
+
+            boards[alive] = spawn_tiles(results[rows, choice], rng)
+            scores[alive] += gained[rows, choice]
+            moves[alive] += 1
+
+        return {
+            "scores": scores,
+            "moves": moves,
+            "max_tiles": np.left_shift(1, max_exponents(boards).astype(np.int64)),
+        }
+
+
+# Function to run many games in batches and summarize them
+def run(num_games, policy=random_policy, seed=None, batch_size=DEFAULT_BATCH_SIZE):
+    simulator = BatchSimulator(policy, seed)
+    # Empty typed arrays first, so that no games (num_games <= 0) gives empty results
+    scores = [np.empty(0, dtype=np.int64)]
+    moves = [np.empty(0, dtype=np.int64)]
+    max_tiles = [np.empty(0, dtype=np.int64)]
+    start = time.perf_counter()
+    remaining = num_games
+    while remaining > 0:
+        batch = simulator.play(min(batch_size, remaining))
+        scores.append(batch["scores"])
+        moves.append(batch["moves"])
+        max_tiles.append(batch["max_tiles"])
+        remaining -= batch_size
+    elapsed = time.perf_counter() - start
+    scores = np.concatenate(scores)
+    moves = np.concatenate(moves)
+    max_tiles = np.concatenate(max_tiles)
+    tiles, counts = np.unique(max_tiles, return_counts=True)
+    return {
+        "games": len(scores),
+        "seconds": elapsed,
+        "games_per_second": len(scores) / elapsed if elapsed else 0.0,
+        "moves_per_second": moves.sum() / elapsed if elapsed else 0.0,
+        "score_mean": float(scores.mean()) if len(scores) else 0.0,
+        "score_std": float(scores.std()) if len(scores) else 0.0,
+        "score_percentiles": dict(zip((5, 25, 50, 75, 95, 99),
+                                      np.percentile(scores, (5, 25, 50, 75, 95, 99)).tolist())) if len(scores) else {},
+        "max_tile_counts": dict(zip(tiles.tolist(), counts.tolist())),
+    }
+
+
+def print_report(stats):
+    print(f"Games: {stats['games']} in {stats['seconds']:.2f}s")
+    print(f"Games per second: {stats['games_per_second']:.1f}")
+    print(f"Moves per second: {stats['moves_per_second']:.1f}")
+    print(f"Score mean: {stats['score_mean']:.1f} (std {stats['score_std']:.1f})")
+    for percentile, value in stats["score_percentiles"].items():
+        print(f"  p{percentile}: {value:.0f}")
+    print("Max tile distribution:")
+    for tile, count in stats["max_tile_counts"].items():
+        print(f"  {tile}: {count} ({100.0 * count / stats['games']:.2f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run batches of random 2048 games with NumPy.")
+    parser.add_argument("--games", type=int, default=100000, help="total number of games")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="games played in lock-step")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+    print_report(run(args.games, seed=args.seed, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import random
+
+# Headless 2048 engine.
+#
+# The whole 4x4 board is packed into one 64-bit integer. Each cell is a 4-bit
+# nibble holding the tile exponent (0 = empty, 1 = 2, 2 = 4, ... 15 = 32768).
+# Row r lives in bits 16*r .. 16*r+15 and column c is nibble c of that row, so
+# cell (r, c) is nibble 4*r + c of the board.
+
+SIZE = 4
+ROW_MASK = 0xFFFF
+CELL_MASK = 0xF
+MAX_EXPONENT = 15
+DIRECTIONS = ("up", "down", "left", "right")
+# New tiles are a 2 or a 4 with equal probability, as in the original game
+SPAWN_EXPONENTS = (1, 2)
+
+
+# Function to unpack a 16-bit row into its four exponents
+def unpack_row(row):
+    return [(row >> (4 * c)) & CELL_MASK for c in range(SIZE)]
+
+
+# Function to pack four exponents into a 16-bit row
+def pack_row(cells):
+    row = 0
+    for c, exponent in enumerate(cells):
+        row |= exponent << (4 * c)
+    return row
+
+
+# Function to slide and merge one row towards column 0
+def _slide_row_left(cells):
+    tiles = [e for e in cells if e != 0]
+    merged = []
+    score = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < MAX_EXPONENT:
+            merged.append(tiles[i] + 1)
+            score += 1 << (tiles[i] + 1)
+            i += 2
+        else:
+            merged.append(tiles[i])
+            i += 1
+    merged += [0] * (SIZE - len(merged))
+    return merged, score
+
+
+# Function to build the 65536-entry row lookup tables
+def _build_tables():
+    left = [0] * 65536
+    right = [0] * 65536
+    left_score = [0] * 65536
+    right_score = [0] * 65536
+    for row in range(65536):
+        cells = unpack_row(row)
+        merged, score = _slide_row_left(cells)
+        left[row] = pack_row(merged)
+        left_score[row] = score
+        merged, score = _slide_row_left(cells[::-1])
+        right[row] = pack_row(merged[::-1])
+        right_score[row] = score
+    return left, right, left_score, right_score
+
+
+ROW_LEFT, ROW_RIGHT, ROW_LEFT_SCORE, ROW_RIGHT_SCORE = _build_tables()
+
+
+# Function to transpose the board so columns become rows
+def transpose(board):
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+# Function to apply a row table to all four rows of the board
+def _move_rows(board, table, score_table):
+    result = 0
+    score = 0
+    for shift in (0, 16, 32, 48):
+        row = (board >> shift) & ROW_MASK
+        result |= table[row] << shift
+        score += score_table[row]
+    return result, score
+
+
+def move_left(board):
+    return _move_rows(board, ROW_LEFT, ROW_LEFT_SCORE)
+
+
+def move_right(board):
+    return _move_rows(board, ROW_RIGHT, ROW_RIGHT_SCORE)
+
+
+def move_up(board):
+    result, score = _move_rows(transpose(board), ROW_LEFT, ROW_LEFT_SCORE)
+    return transpose(result), score
+
+
+def move_down(board):
+    result, score = _move_rows(transpose(board), ROW_RIGHT, ROW_RIGHT_SCORE)
+    return transpose(result), score
+
+
+MOVES = {"up": move_up, "down": move_down, "left": move_left, "right": move_right}
+
+
+# Function to apply a move in the given direction, returning (board, score gained)
+def move(board, direction):
+    return MOVES[direction](board)
+
+
+# Function to list the nibble indices of the empty cells
+def empty_cells(board):
+    return [i for i in range(SIZE * SIZE) if (board >> (4 * i)) & CELL_MASK == 0]
+
+
+# Function to count the empty cells
+def count_empty(board):
+    count = 0
+    for i in range(SIZE * SIZE):
+        if (board >> (4 * i)) & CELL_MASK == 0:
+            count += 1
+    return count
+
+
+# Function to place a 2 or a 4 on a random empty cell
+def spawn_tile(board, rng=random):
+    cells = empty_cells(board)
+    if not cells:
+        return board
+    index = rng.choice(cells)
+    exponent = rng.choice(SPAWN_EXPONENTS)
+    return board | (exponent << (4 * index))
+
+
+# Function to check whether any move changes the board
+def can_move(board):
+    for direction in DIRECTIONS:
+        if move(board, direction)[0] != board:
+            return True
+    return False
+
+
+def is_game_over(board):
+    return not can_move(board)
+
+
+def max_exponent(board):
+    return max((board >> (4 * i)) & CELL_MASK for i in range(SIZE * SIZE))
+
+
+def max_tile(board):
+    exponent = max_exponent(board)
+    return 1 << exponent if exponent else 0
+
+
+# Function to convert a packed board into a list of lists of tile values
+def to_grid(board):
+    grid = []
+    for r in range(SIZE):
+        row = (board >> (16 * r)) & ROW_MASK
+        grid.append([1 << e if e else 0 for e in unpack_row(row)])
+    return grid
+
+
+# Function to convert a list of lists of tile values into a packed board
+def from_grid(grid):
+    board = 0
+    for r in range(SIZE):
+        for c in range(SIZE):
+            value = grid[r][c]
+            if value:
+                board |= (value.bit_length() - 1) << (4 * (SIZE * r + c))
+    return board
+
+
+class GameEngine:
+    """Mutable game state (packed board plus score) used by the GUI and bots."""
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.board = 0
+        self.score = 0
+
+    def reset(self):
+        self.board = 0
+        self.score = 0
+
+    def add_tile(self):
+        self.board = spawn_tile(self.board, self.rng)
+
+    def move(self, direction):
+        """Apply a move and return True if the board changed."""
+        board, score_add = move(self.board, direction)
+        if board == self.board:
+            return False
+        self.board = board
+        self.score += score_add
+        return True
+
+    def is_game_over(self):
+        return is_game_over(self.board)
+
+    def grid(self):
+        return to_grid(self.board)
@@ -0,0 +1,103 @@
+import argparse
+import random
+import tracemalloc
+from array import array
+
+import Game2048Engine as engine
+
+# Bounded undo history for 2048.
+#
+# States are stored as packed 64-bit boards and scores in two fixed-size
+# arrays used as a ring buffer, so the oldest state is overwritten once the
+# configured depth is reached.
+
+DEFAULT_DEPTH = 64
+
+
+class UndoHistory:
+    def __init__(self, depth=DEFAULT_DEPTH):
+        if depth < 1:
+            raise ValueError("history depth must be at least 1")
+        self.depth = depth
+        self.boards = array("Q", bytes(8 * depth))
+        self.scores = array("q", bytes(8 * depth))
+        self.start = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def push(self, score, board):
+        index = (self.start + self.length) % self.depth
+        self.boards[index] = board
+        self.scores[index] = score
+        if self.length < self.depth:
+            self.length += 1
+        else:
+            self.start = (self.start + 1) % self.depth
+
+    def pop(self):
+        """Remove and return the newest (score, board), or None if empty."""
+        if not self.length:
+            return None
+        self.length -= 1
+        index = (self.start + self.length) % self.depth
+        return self.scores[index], self.boards[index]
+
+    def clear(self):
+        self.start = 0
+        self.length = 0
+
+
+# Function to generate (score, board) states from a random session
+def _session_states(num_moves, seed):
+    rng = random.Random(seed)
+    game = engine.GameEngine(rng)
+    game.add_tile()
+    game.add_tile()
+    for _ in range(num_moves):
+        if game.is_game_over():
+            game.reset()
+            game.add_tile()
+            game.add_tile()
+        yield game.score, game.board
+        while not game.move(rng.choice(engine.DIRECTIONS)):
+            pass
+        game.add_tile()
+
+
+# Function to measure the memory held by the old and new histories
+def benchmark(num_moves=100000, depth=DEFAULT_DEPTH, seed=0):
+    states = list(_session_states(num_moves, seed))
+
+    tracemalloc.start()
+    old_history = []
+    for score, board in states:
+        old_history.append((score, engine.to_grid(board)))
+    old_bytes = tracemalloc.get_traced_memory()[0]
+    del old_history
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    new_history = UndoHistory(depth)
+    for score, board in states:
+        new_history.push(score, board)
+    new_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return old_bytes, new_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare undo history memory over a long session.")
+    parser.add_argument("--moves", type=int, default=100000, help="number of moves in the session")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="ring buffer depth")
+    args = parser.parse_args()
+
+    old_bytes, new_bytes = benchmark(args.moves, args.depth)
+    print(f"Moves: {args.moves}")
+    print(f"List-of-lists history: {old_bytes / 1024 / 1024:.2f} MiB")
+    print(f"Ring buffer history (depth {args.depth}): {new_bytes / 1024:.2f} KiB")
+
+
+if __name__ == "__main__":
+    main()
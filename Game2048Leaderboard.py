@@ -0,0 +1,271 @@
+import argparse
+import heapq
+import json
+import os
+import random
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked appends
+    fcntl = None
+
+# Persistent leaderboard for 2048.
+#
+# Every finished game is appended as one JSON line to <path>.log. In memory we
+# keep a min-heap of the best top_k entries and a histogram of all scores, so
+# top-K and percentile queries never touch the disk. Once the log grows past
+# compact_every entries it is folded into <path>.snapshot.json (top entries
+# with metadata plus the score histogram) and truncated. Writers and the
+# compactor hold an exclusive lock on the log, and readers a shared one, so a
+# reader never sees the new snapshot next to the old log or the other way round.
+
+DEFAULT_PATH = "leaderboard"
+DEFAULT_TOP_K = 100
+DEFAULT_COMPACT_EVERY = 10000
+LEGACY_FILE = "leaderboard.json"
+
+
+class _FileLock:
+    """Advisory lock on an open file, exclusive or shared (no-op where fcntl is missing)."""
+
+    def __init__(self, file, shared=False):
+        self.file = file
+        self.shared = shared
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        return self.file
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+
+class Leaderboard:
+    def __init__(self, path=DEFAULT_PATH, top_k=DEFAULT_TOP_K, compact_every=DEFAULT_COMPACT_EVERY):
+        self.log_path = path + ".log"
+        self.snapshot_path = path + ".snapshot.json"
+        self.top_k = top_k
+        self.compact_every = compact_every
+        self.load()
+
+    def load(self):
+        if (not os.path.exists(self.snapshot_path) and not os.path.exists(self.log_path)
+                and os.path.exists(LEGACY_FILE)):
+            self._reset()
+            self._import_legacy()
+            return
+        with open(self.log_path, "a+b") as log, _FileLock(log, shared=True):
+            self._load(log)
+
+    def _reset(self):
+        self.heap = []
+        self.histogram = Counter()
+        self.count = 0
+        self.log_entries = 0
+        self.log_offset = 0
+        self.snapshot_stamp = None
+        self._sequence = 0
+        self._sorted_scores = None
+        self._sorted_top = None
+
+    # Function to read the snapshot and then the log; the caller holds the log lock
+    def _load(self, log):
+        self._reset()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            self.snapshot_stamp = self._snapshot_stamp()
+            for score, count in snapshot["histogram"]:
+                self.histogram[score] += count
+                self.count += count
+            for entry in snapshot["top"]:
+                self._push_top(entry)
+        self._read_log(log)
+
+    # Function to import the old "Score: N" list the first time we run
+    def _import_legacy(self):
+        with open(LEGACY_FILE, "r") as f:
+            legacy = json.load(f)
+        for item in legacy:
+            self.add(int(str(item).split()[-1]), timestamp=0)
+
+    def _read_log(self, log):
+        log.seek(self.log_offset)
+        for line in log:
+            if not line.endswith(b"\n"):
+                break  # partially written line (only possible without fcntl)
+            self.log_offset += len(line)
+            self._apply(json.loads(line))
+
+    def _apply(self, entry):
+        self.histogram[entry["score"]] += 1
+        self.count += 1
+        self.log_entries += 1
+        self._sorted_scores = None
+        self._push_top(entry)
+
+    def _push_top(self, entry):
+        self._sequence += 1
+        item = (entry["score"], self._sequence, entry)
+        if len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+        else:
+            return
+        self._sorted_top = None
+
+    def refresh(self):
+        """Pick up entries appended or compacted by other processes."""
+        with open(self.log_path, "a+b") as log, _FileLock(log, shared=True):
+            self._refresh(log)
+
+    # Function to identify the current snapshot; os.replace gives every compaction
+    # a new inode, and mtime alone can repeat within one clock tick
+    def _snapshot_stamp(self):
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _refresh(self, log):
+        if self._snapshot_stamp() != self.snapshot_stamp or os.fstat(log.fileno()).st_size < self.log_offset:
+            self._load(log)
+        else:
+            self._read_log(log)
+
+    def add(self, score, max_tile=0, moves=0, timestamp=None):
+        entry = {
+            "score": int(score),
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "max_tile": int(max_tile),
+            "moves": int(moves),
+        }
+        self.add_many([entry])
+        return entry
+
+    def add_many(self, entries):
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        with open(self.log_path, "ab") as f:
+            with _FileLock(f):
+                f.write(data)
+                f.flush()  # before unlocking, or a compaction could truncate it away
+        self.refresh()
+        if self.log_entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the log into the snapshot and truncate it."""
+        with open(self.log_path, "a+b") as f:
+            with _FileLock(f):
+                self._refresh(f)
+                snapshot = {
+                    "top": [entry for _, _, entry in self.heap],
+                    "histogram": sorted(self.histogram.items()),
+                }
+                tmp_path = self.snapshot_path + ".tmp"
+                with open(tmp_path, "w") as out:
+                    json.dump(snapshot, out)
+                os.replace(tmp_path, self.snapshot_path)
+                f.truncate(0)
+                self.snapshot_stamp = self._snapshot_stamp()
+                self.log_offset = 0
+                self.log_entries = 0
+
+    def top(self, k=5):
+        if self._sorted_top is None:
+            self._sorted_top = [entry for _, _, entry in sorted(self.heap, reverse=True)]
+        return self._sorted_top[:k]
+
+    def _cumulative(self):
+        if self._sorted_scores is None:
+            scores = sorted(self.histogram)
+            cumulative = []
+            total = 0
+            for score in scores:
+                total += self.histogram[score]
+                cumulative.append(total)
+            self._sorted_scores = (scores, cumulative)
+        return self._sorted_scores
+
+    def percentile(self, p):
+        """Return the score at percentile p (0-100), or None if empty."""
+        if not self.count:
+            return None
+        scores, cumulative = self._cumulative()
+        target = max(1, -(-self.count * p // 100))
+        return scores[min(bisect_left(cumulative, target), len(scores) - 1)]
+
+    def rank(self, score):
+        """Return the percentage of recorded games scoring at or below score."""
+        if not self.count:
+            return 0.0
+        scores, cumulative = self._cumulative()
+        index = bisect_right(scores, score)
+        return 100.0 * (cumulative[index - 1] if index else 0) / self.count
+
+
+# Function to time bulk inserts and queries
+def benchmark(path, entries, seed=0):
+    for suffix in (".log", ".snapshot.json"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    board = Leaderboard(path, compact_every=max(entries // 10, 1))
+    start = time.perf_counter()
+    batch = []
+    for _ in range(entries):
+        batch.append({"score": rng.randrange(0, 60000, 4), "timestamp": 0,
+                      "max_tile": 1 << rng.randrange(5, 12), "moves": rng.randrange(50, 2000)})
+        if len(batch) == 10000:
+            board.add_many(batch)
+            batch = []
+    if batch:
+        board.add_many(batch)
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reloaded = Leaderboard(path)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for p in range(1, 101):
+        reloaded.percentile(p)
+        reloaded.top(10)
+    query_seconds = (time.perf_counter() - start) / 100
+    return insert_seconds, load_seconds, query_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the 2048 leaderboard.")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="leaderboard file prefix")
+    parser.add_argument("--top", type=int, default=10, help="number of top entries to show")
+    parser.add_argument("--compact", action="store_true", help="compact the log before reporting")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="insert N random entries and time queries")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        insert_seconds, load_seconds, query_seconds = benchmark(args.path, args.benchmark)
+        print(f"Inserted {args.benchmark} entries in {insert_seconds:.2f}s")
+        print(f"Reloaded in {load_seconds * 1000:.1f} ms")
+        print(f"Percentile + top-10 query: {query_seconds * 1e6:.1f} us")
+        return
+
+    board = Leaderboard(args.path)
+    if args.compact:
+        board.compact()
+    print(f"Games recorded: {board.count}")
+    for entry in board.top(args.top):
+        print(f"{entry['score']:>8}  max tile {entry['max_tile']:>5}  moves {entry['moves']:>5}")
+    if board.count:
+        print(f"Median score: {board.percentile(50)}, p99: {board.percentile(99)}")
+
+
+if __name__ == "__main__":
+    main()
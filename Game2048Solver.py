@@ -0,0 +1,260 @@
+import argparse
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import Game2048Engine as engine
+
+# Expectimax auto-player for 2048.
+#
+# Max nodes try the four moves, chance nodes average over every empty cell and
+# every spawned tile. Chance nodes are cached in a bounded transposition table
+# keyed on the packed board, and the four root moves can be searched in
+# parallel in a process pool.
+
+# Heuristic weights
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+# Search limits
+DEFAULT_DEPTH = 2
+DEFAULT_CACHE_SIZE = 200000
+PROBABILITY_THRESHOLD = 0.0001
+
+
+# Function to score a single row of exponents
+def _row_heuristic(cells):
+    empty = 0
+    merges = 0
+    previous = 0
+    counter = 0
+    for exponent in cells:
+        if exponent == 0:
+            empty += 1
+            continue
+        if previous == exponent:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = exponent
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for i in range(1, engine.SIZE):
+        a = cells[i - 1] ** MONOTONICITY_POWER
+        b = cells[i] ** MONOTONICITY_POWER
+        if cells[i - 1] > cells[i]:
+            monotonicity_left += a - b
+        else:
+            monotonicity_right += b - a
+
+    total = sum(exponent ** SUM_POWER for exponent in cells)
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right)
+            - SUM_WEIGHT * total)
+
+
+ROW_HEURISTIC = [_row_heuristic(engine.unpack_row(row)) for row in range(65536)]
+
+
+# Function to evaluate a board from its rows and columns
+def evaluate(board):
+    transposed = engine.transpose(board)
+    value = 0.0
+    for shift in (0, 16, 32, 48):
+        value += ROW_HEURISTIC[(board >> shift) & engine.ROW_MASK]
+        value += ROW_HEURISTIC[(transposed >> shift) & engine.ROW_MASK]
+    return value
+
+
+class TranspositionTable:
+    """Bounded LRU cache of chance-node values keyed on the packed board.
+
+    An entry is only reused when it was searched at least as deep as the
+    current request, and a deeper result replaces a shallower one.
+    """
+
+    def __init__(self, capacity=DEFAULT_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board, depth):
+        entry = self.entries.get(board)
+        if entry is not None and entry[0] >= depth:
+            self.entries.move_to_end(board)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, board, depth, value):
+        entry = self.entries.get(board)
+        if entry is not None and entry[0] > depth:
+            return
+        self.entries[board] = (depth, value)
+        self.entries.move_to_end(board)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Per-process table, so pool workers keep their cache between searches
+_table = TranspositionTable()
+
+
+def _init_worker(cache_size):
+    global _table
+    _table = TranspositionTable(cache_size)
+
+
+def _max_node(board, depth, probability):
+    best = 0.0
+    for direction in engine.DIRECTIONS:
+        new_board = engine.move(board, direction)[0]
+        if new_board != board:
+            best = max(best, _chance_node(new_board, depth, probability))
+    return best
+
+
+def _chance_node(board, depth, probability):
+    if depth <= 0 or probability < PROBABILITY_THRESHOLD:
+        return evaluate(board)
+    cached = _table.get(board, depth)
+    if cached is not None:
+        return cached
+
+    cells = engine.empty_cells(board)
+    if not cells:
+        return evaluate(board)
+    tile_probability = 1.0 / len(engine.SPAWN_EXPONENTS)
+    cell_probability = probability / len(cells)
+    total = 0.0
+    for index in cells:
+        for exponent in engine.SPAWN_EXPONENTS:
+            child = board | (exponent << (4 * index))
+            total += tile_probability * _max_node(child, depth - 1, cell_probability * tile_probability)
+    value = total / len(cells)
+    _table.put(board, depth, value)
+    return value
+
+
+# Function to score one root move; runs inside pool workers
+def score_move(board, direction, depth=DEFAULT_DEPTH):
+    new_board = engine.move(board, direction)[0]
+    if new_board == board:
+        return None
+    return _chance_node(new_board, depth, 1.0)
+
+
+class Solver:
+    """Chooses moves by expectimax search, optionally over a process pool."""
+
+    def __init__(self, depth=DEFAULT_DEPTH, workers=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.depth = depth
+        self.cache_size = cache_size
+        self.workers = workers
+        self.pool = None
+        if workers is None or workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(cache_size,))
+        else:
+            _init_worker(cache_size)
+
+    def best_move(self, board):
+        """Return the best direction for the board, or None if no move is possible."""
+        if self.pool is not None:
+            futures = {direction: self.pool.submit(score_move, board, direction, self.depth)
+                       for direction in engine.DIRECTIONS}
+            scores = {direction: future.result() for direction, future in futures.items()}
+        else:
+            scores = {direction: score_move(board, direction, self.depth)
+                      for direction in engine.DIRECTIONS}
+        scores = {direction: score for direction, score in scores.items() if score is not None}
+        if not scores:
+            return None
+        return max(scores, key=scores.get)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Function to play full games headlessly and collect statistics
+def play_games(solver, num_games, seed=None, max_moves=None):
+    rng = random.Random(seed)
+    scores = []
+    max_tiles = []
+    total_moves = 0
+    start = time.perf_counter()
+    for _ in range(num_games):
+        game = engine.GameEngine(rng)
+        game.add_tile()
+        game.add_tile()
+        moves = 0
+        while max_moves is None or moves < max_moves:
+            direction = solver.best_move(game.board)
+            if direction is None:
+                break
+            game.move(direction)
+            game.add_tile()
+            moves += 1
+        scores.append(game.score)
+        max_tiles.append(engine.max_tile(game.board))
+        total_moves += moves
+    elapsed = time.perf_counter() - start
+    return {
+        "games": num_games,
+        "moves": total_moves,
+        "seconds": elapsed,
+        "moves_per_second": total_moves / elapsed if elapsed else 0.0,
+        "average_score": sum(scores) / num_games if num_games else 0.0,
+        "scores": scores,
+        "max_tiles": max_tiles,
+    }
+
+
+def print_report(stats):
+    print(f"Games played: {stats['games']}")
+    print(f"Total moves: {stats['moves']} in {stats['seconds']:.2f}s")
+    print(f"Moves per second: {stats['moves_per_second']:.1f}")
+    print(f"Average score: {stats['average_score']:.1f}")
+    print(f"Best tile reached: {max(stats['max_tiles'], default=0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the 2048 expectimax auto-player headlessly.")
+    parser.add_argument("--games", type=int, default=1, help="number of games to play")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="search depth in chance layers")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (1 searches in-process)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="transposition table entries")
+    parser.add_argument("--max-moves", type=int, default=None, help="stop each game after this many moves")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for tile spawns")
+    args = parser.parse_args()
+
+    with Solver(args.depth, args.workers, args.cache_size) as solver:
+        stats = play_games(solver, args.games, args.seed, args.max_moves)
+    print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
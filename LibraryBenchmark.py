@@ -0,0 +1,322 @@
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from LibraryCirculation import issue_books, return_books
+from LibraryDatabase import Database, connect
+from LibraryImport import import_catalog
+from LibraryManagementSystem import setup_database
+from LibraryMigrations import migrate
+from LibraryReports import report_lines
+from LibrarySearch import search_books
+
+# Benchmarks for the library database layer. Each benchmark builds its own
+# database in a temporary directory, so library.db is never touched.
+
+
+# Function to add extra books numbered from first_book_id
+def seed_books(conn, count, first_book_id=1000):
+    with conn:
+        conn.executemany("INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, 1)",
+                         ((first_book_id + i, f"Title {i}", f"Author {i % 1000}") for i in range(count)))
+
+
+# Issue and return one book the way the handlers did before: a fresh
+# connection with default journaling per operation
+def _issue_return_per_connection(path, book_id, user_id):
+    issue_date = datetime.now().strftime('%Y-%m-%d')
+    return_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT available FROM books WHERE book_id=?", (book_id,))
+    if cursor.fetchone()[0]:
+        cursor.execute("INSERT INTO issues (book_id, user_id, issue_date, return_date) VALUES (?, ?, ?, ?)",
+                       (book_id, user_id, issue_date, return_date))
+        cursor.execute("UPDATE books SET available=0 WHERE book_id=?", (book_id,))
+        conn.commit()
+    conn.close()
+
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM issues WHERE book_id=? AND return_date IS NOT NULL", (book_id,))
+    if cursor.fetchone():
+        cursor.execute("UPDATE books SET available=1 WHERE book_id=?", (book_id,))
+        cursor.execute("DELETE FROM issues WHERE book_id=?", (book_id,))
+        conn.commit()
+    conn.close()
+
+
+# Issue and return one book through the shared Database
+def _issue_return_shared(db, book_id, user_id):
+    issue_date = datetime.now().strftime('%Y-%m-%d')
+    return_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+
+    if db.query_one("SELECT available FROM books WHERE book_id=?", (book_id,))[0]:
+        with db.transaction():
+            db.execute("INSERT INTO issues (book_id, user_id, issue_date, return_date) VALUES (?, ?, ?, ?)",
+                       (book_id, user_id, issue_date, return_date))
+            db.execute("UPDATE books SET available=0 WHERE book_id=?", (book_id,))
+
+    if db.query_one("SELECT id FROM issues WHERE book_id=? AND return_date IS NOT NULL", (book_id,)):
+        with db.transaction():
+            db.execute("UPDATE books SET available=1 WHERE book_id=?", (book_id,))
+            db.execute("DELETE FROM issues WHERE book_id=?", (book_id,))
+
+
+def benchmark_circulation(operations=2000, books=10000):
+    """Return (before, after) issue+return operations per second."""
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        setup_database(before_path)
+        conn = sqlite3.connect(before_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        seed_books(conn, books)
+        conn.close()
+
+        start = time.perf_counter()
+        for i in range(operations):
+            _issue_return_per_connection(before_path, 1000 + i % books, 2)
+        before = 2 * operations / (time.perf_counter() - start)
+
+        after_path = os.path.join(tmp, "after.db")
+        setup_database(after_path)
+        db = Database(after_path)
+        seed_books(db.conn, books)
+
+        start = time.perf_counter()
+        for i in range(operations):
+            _issue_return_shared(db, 1000 + i % books, 2)
+        after = 2 * operations / (time.perf_counter() - start)
+        db.close()
+    return before, after
+
+
+# Function to add issue rows for random books and users
+def seed_issues(conn, count, books, users=1000, first_book_id=1000, seed=0):
+    rng = random.Random(seed)
+    with conn:
+        conn.executemany("INSERT INTO issues (book_id, user_id, issue_date, return_date) VALUES (?, ?, ?, ?)",
+                         ((first_book_id + rng.randrange(books), rng.randrange(users),
+                           '2024-08-01', '2024-08-15') for _ in range(count)))
+
+
+# Function to return the mean latency of a query in milliseconds
+def time_query(conn, sql, params_list):
+    start = time.perf_counter()
+    for params in params_list:
+        conn.execute(sql, params).fetchall()
+    return 1000 * (time.perf_counter() - start) / len(params_list)
+
+
+HOT_QUERIES = (
+    ("issue by book_id", "SELECT id FROM issues WHERE book_id=? AND return_date IS NOT NULL",
+     lambda rng, books: (1000 + rng.randrange(books),)),
+    ("issues by user_id", "SELECT id FROM issues WHERE user_id=?",
+     lambda rng, books: (rng.randrange(1000),)),
+    ("login", "SELECT id, role FROM users WHERE username=? AND password=?",
+     lambda rng, books: ('user1', 'userpass')),
+)
+
+
+def benchmark_schema(books=1000000, issues=5000000, samples=5):
+    """Time startup and hot-query latency before and after the index migration."""
+    results = {}
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schema.db")
+        conn = connect(path)
+        migrate(conn, target=1)
+        seed_books(conn, books)
+        seed_issues(conn, issues, books)
+
+        for name, sql, make_params in HOT_QUERIES:
+            results[name] = [time_query(conn, sql, [make_params(rng, books) for _ in range(samples)])]
+
+        start = time.perf_counter()
+        migrate(conn, target=2)
+        results["index build (one-off)"] = time.perf_counter() - start
+        start = time.perf_counter()
+        migrate(conn)
+        results["later migrations (one-off)"] = time.perf_counter() - start
+
+        for name, sql, make_params in HOT_QUERIES:
+            results[name].append(time_query(conn, sql, [make_params(rng, books) for _ in range(samples * 100)]))
+        conn.close()
+
+        start = time.perf_counter()
+        setup_database(path)
+        results["startup, schema current"] = time.perf_counter() - start
+
+        # What every launch used to do: drop everything and reseed
+        start = time.perf_counter()
+        conn = connect(path)
+        for table in ("users", "books", "issues", "transactions"):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("PRAGMA user_version = 0")
+        migrate(conn, target=1)
+        conn.close()
+        results["startup, drop and reseed"] = time.perf_counter() - start
+    return results
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def benchmark_search(books=1000000, queries=500, seed=0):
+    """Import a random-word catalog and time first- and second-page searches.
+
+    Besides random words, titles often contain a few common words, and the
+    "broad" queries (single letters, common words and their prefixes) match
+    a large share of the catalog.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(20000)]
+    common = ["the", "history", "volume", "guide"]
+    broad = list(letters) + common + ["hi", "hist", "vol", "the history", "volume guide"]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = os.path.join(tmp, "catalog.csv")
+        with open(catalog, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["title", "author"])
+            for _ in range(books):
+                title = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 5)))
+                title = " ".join(word for word in common if rng.random() < 0.4) + " " + title
+                author = " ".join(rng.choice(vocabulary).title() for _ in range(2))
+                writer.writerow([title, author])
+
+        path = os.path.join(tmp, "search.db")
+        start = time.perf_counter()
+        import_catalog(catalog, path, defer_indexes=True)
+        results["import and index"] = time.perf_counter() - start
+
+        db = Database(path)
+        for label, texts in (("", [" ".join(word[:rng.randint(2, len(word))]
+                                            for word in rng.sample(vocabulary, rng.randint(1, 2)))
+                                   for _ in range(queries)]),
+                             ("broad ", broad)):
+            first_page, second_page = [], []
+            for text in texts:
+                start = time.perf_counter()
+                _, cursor = search_books(db, text)
+                first_page.append(1000 * (time.perf_counter() - start))
+                if cursor is not None:
+                    start = time.perf_counter()
+                    search_books(db, text, after=cursor)
+                    second_page.append(1000 * (time.perf_counter() - start))
+            results[label + "first page"] = first_page
+            results[label + "next page"] = second_page
+        db.close()
+    return results
+
+
+def benchmark_reports(books=100000, issues=1000000, renders=20):
+    """Return (seconds to load history, mean ms per full ReportsPage render)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reports.db")
+        setup_database(path)
+        db = Database(path)
+        seed_books(db.conn, books)
+        start = time.perf_counter()
+        seed_issues(db.conn, issues, books)
+        with db.transaction():
+            db.execute("INSERT INTO transactions (issue_id, fine, paid) "
+                       "SELECT id, (id % 7) * 0.5, id % 2 FROM issues WHERE id % 10 = 0")
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(renders):
+            report_lines(db, today='2024-08-10')
+        render_ms = 1000 * (time.perf_counter() - start) / renders
+        db.close()
+    return load_seconds, render_ms
+
+
+def benchmark_batch(items=20000, batch_size=1000, books=100000):
+    """Return (per-item, batched) issue+return operations per second."""
+    rates = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for batched in (False, True):
+            path = os.path.join(tmp, f"batch{int(batched)}.db")
+            setup_database(path)
+            db = Database(path)
+            seed_books(db.conn, books)
+            book_ids = [1000 + i % books for i in range(items)]
+            size = batch_size if batched else 1
+
+            start = time.perf_counter()
+            for offset in range(0, items, size):
+                chunk = book_ids[offset:offset + size]
+                issue_books(db, [(book_id, 2) for book_id in chunk])
+                return_books(db, chunk)
+            rates.append(2 * items / (time.perf_counter() - start))
+            db.close()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the library database layer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    circulation = commands.add_parser("circulation", help="issue/return throughput per connection strategy")
+    circulation.add_argument("--operations", type=int, default=2000, help="issue/return pairs to run")
+    circulation.add_argument("--books", type=int, default=10000, help="books in the catalog")
+
+    schema = commands.add_parser("schema", help="startup time and query latency with migrations")
+    schema.add_argument("--books", type=int, default=1000000, help="books in the catalog")
+    schema.add_argument("--issues", type=int, default=5000000, help="rows in issues")
+
+    search = commands.add_parser("search", help="full-text search latency on a large catalog")
+    search.add_argument("--books", type=int, default=1000000, help="books in the catalog")
+    search.add_argument("--queries", type=int, default=500, help="random queries to time")
+
+    reports = commands.add_parser("reports", help="ReportsPage render time against a large history")
+    reports.add_argument("--books", type=int, default=100000, help="books in the catalog")
+    reports.add_argument("--issues", type=int, default=1000000, help="rows in issues")
+
+    batch = commands.add_parser("batch", help="batched vs per-item circulation throughput")
+    batch.add_argument("--items", type=int, default=20000, help="books to issue and return")
+    batch.add_argument("--batch-size", type=int, default=1000, help="items per transaction")
+    args = parser.parse_args()
+
+    if args.command == "circulation":
+        before, after = benchmark_circulation(args.operations, args.books)
+        print(f"Connection per call, default journal: {before:.0f} ops/s")
+        print(f"Shared connection, WAL + pragmas:     {after:.0f} ops/s ({after / before:.1f}x)")
+    elif args.command == "schema":
+        results = benchmark_schema(args.books, args.issues)
+        for name, _, _ in HOT_QUERIES:
+            unindexed, indexed = results[name]
+            print(f"{name}: {unindexed:.2f} ms unindexed, {indexed:.3f} ms indexed")
+        for name in ("index build (one-off)", "later migrations (one-off)", "startup, schema current",
+                     "startup, drop and reseed"):
+            print(f"{name}: {results[name] * 1000:.1f} ms")
+    elif args.command == "search":
+        results = benchmark_search(args.books, args.queries)
+        print(f"Import and index: {results['import and index']:.1f}s")
+        for name in ("first page", "next page", "broad first page", "broad next page"):
+            latencies = results[name]
+            if latencies:
+                print(f"{name}: p50 {_percentile(latencies, 50):.2f} ms, p99 {_percentile(latencies, 99):.2f} ms "
+                      f"over {len(latencies)} queries")
+    elif args.command == "reports":
+        load_seconds, render_ms = benchmark_reports(args.books, args.issues)
+        print(f"Loaded {args.issues} issues (summaries maintained by triggers) in {load_seconds:.1f}s")
+        print(f"Full report render: {render_ms:.2f} ms")
+    elif args.command == "batch":
+        single, batched = benchmark_batch(args.items, args.batch_size)
+        print(f"One item per transaction: {single:.0f} ops/s")
+        print(f"Batches of {args.batch_size}: {batched:.0f} ops/s ({batched / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+# Batch circulation: issue or return a whole list of books in one
+# transaction.
+#
+# Each batch is loaded into a temp table, every item is validated and given
+# a status by one UPDATE, and the issues and books tables are then changed
+# with a single set-based statement each. Results come back per item, in
+# input order.
+
+LOAN_DAYS = 14
+
+# Per-item statuses
+ISSUED = "issued"
+RETURNED = "returned"
+NOT_FOUND = "not_found"
+UNKNOWN_USER = "unknown_user"
+UNAVAILABLE = "unavailable"
+NOT_ISSUED = "not_issued"
+DUPLICATE = "duplicate"
+
+MESSAGES = {
+    ISSUED: "Book issued successfully!",
+    RETURNED: "Book returned successfully!",
+    NOT_FOUND: "No book with this ID",
+    UNKNOWN_USER: "No user with this ID",
+    UNAVAILABLE: "Book is not available",
+    NOT_ISSUED: "No record of this book being issued",
+    DUPLICATE: "Book appears more than once in this batch",
+}
+
+
+def _batch_table(db, name):
+    db.execute(f'''
+        CREATE TEMP TABLE IF NOT EXISTS {name} (
+            seq INTEGER PRIMARY KEY,
+            book_id INTEGER,
+            user_id INTEGER,
+            status TEXT
+        )
+    ''')
+    db.execute(f"CREATE INDEX IF NOT EXISTS temp.{name}_book ON {name}(book_id, seq)")
+    db.execute(f"DELETE FROM {name}")
+
+
+def issue_books(db, items, today=None):
+    """Issue books given as (book_id, user_id) pairs; return [(book_id, status)]."""
+    today = today or datetime.now()
+    issue_date = today.strftime('%Y-%m-%d')
+    return_date = (today + timedelta(days=LOAN_DAYS)).strftime('%Y-%m-%d')
+    with db.transaction(immediate=True):
+        _batch_table(db, "batch_issue")
+        db.executemany("INSERT INTO batch_issue (seq, book_id, user_id) VALUES (?, ?, ?)",
+                       ((seq, book_id, user_id) for seq, (book_id, user_id) in enumerate(items)))
+        db.execute('''
+            UPDATE batch_issue SET status = CASE
+                WHEN NOT EXISTS (SELECT 1 FROM books b WHERE b.book_id = batch_issue.book_id) THEN ?
+                WHEN NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = batch_issue.user_id) THEN ?
+                WHEN EXISTS (SELECT 1 FROM batch_issue x
+                             WHERE x.book_id = batch_issue.book_id AND x.seq < batch_issue.seq) THEN ?
+                WHEN (SELECT available FROM books b WHERE b.book_id = batch_issue.book_id) THEN ?
+                ELSE ?
+            END
+        ''', (NOT_FOUND, UNKNOWN_USER, DUPLICATE, ISSUED, UNAVAILABLE))
+        db.execute('''
+            INSERT INTO issues (book_id, user_id, issue_date, return_date)
+            SELECT book_id, user_id, ?, ? FROM batch_issue WHERE status = ? ORDER BY seq
+        ''', (issue_date, return_date, ISSUED))
+        db.execute('''
+            UPDATE books SET available = 0
+            WHERE book_id IN (SELECT book_id FROM batch_issue WHERE status = ?)
+        ''', (ISSUED,))
+        return db.query_all("SELECT book_id, status FROM batch_issue ORDER BY seq")
+
+
+def return_books(db, book_ids, today=None):
+    """Close the open issues for each book; return [(book_id, status)]."""
+    returned_date = (today or datetime.now()).strftime('%Y-%m-%d')
+    with db.transaction(immediate=True):
+        _batch_table(db, "batch_return")
+        db.executemany("INSERT INTO batch_return (seq, book_id) VALUES (?, ?)", enumerate(book_ids))
+        db.execute('''
+            UPDATE batch_return SET status = CASE
+                WHEN EXISTS (SELECT 1 FROM batch_return x
+                             WHERE x.book_id = batch_return.book_id AND x.seq < batch_return.seq) THEN ?
+                WHEN EXISTS (SELECT 1 FROM issues i
+                             WHERE i.book_id = batch_return.book_id AND i.returned_date IS NULL) THEN ?
+                WHEN EXISTS (SELECT 1 FROM books b WHERE b.book_id = batch_return.book_id) THEN ?
+                ELSE ?
+            END
+        ''', (DUPLICATE, RETURNED, NOT_ISSUED, NOT_FOUND))
+        db.execute('''
+            UPDATE issues SET returned_date = ?
+            WHERE returned_date IS NULL
+              AND book_id IN (SELECT book_id FROM batch_return WHERE status = ?)
+        ''', (returned_date, RETURNED))
+        db.execute('''
+            UPDATE books SET available = 1
+            WHERE book_id IN (SELECT book_id FROM batch_return WHERE status = ?)
+        ''', (RETURNED,))
+        return db.query_all("SELECT book_id, status FROM batch_return ORDER BY seq")
@@ -0,0 +1,95 @@
+import queue
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Data-access layer for the library system.
+#
+# LibraryApp owns one Database for the lifetime of the window instead of each
+# handler opening its own connection. Connections run in WAL mode with tuned
+# pragmas and a large prepared-statement cache; ConnectionPool hands out a
+# few of them to worker threads.
+
+DB_PATH = 'library.db'
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),   # safe with WAL, avoids an fsync per commit
+    ('cache_size', -32000),      # negative means KiB, so about 32 MB of page cache
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 5000),      # milliseconds to wait on a locked database
+)
+
+
+# Function to open a connection with the library's pragmas applied
+def connect(path=DB_PATH, check_same_thread=True):
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=check_same_thread)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class Database:
+    def __init__(self, path=DB_PATH, conn=None):
+        self.path = path
+        self.conn = conn if conn is not None else connect(path)
+        self.lock_wait = 0.0  # seconds spent in BEGIN IMMEDIATE waiting for the write lock
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        return self.conn.executemany(sql, rows)
+
+    def query_one(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Commit on success, roll back if the block raises.
+
+        immediate takes the write lock up front (BEGIN IMMEDIATE), so a
+        read-then-write block waits on busy_timeout instead of failing when
+        another connection writes first.
+        """
+        if immediate and not self.conn.in_transaction:
+            start = time.perf_counter()
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.lock_wait += time.perf_counter() - start
+        with self.conn:
+            yield self
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ConnectionPool:
+    """Fixed-size pool of Database objects for worker threads."""
+
+    def __init__(self, path=DB_PATH, size=4):
+        self.path = path
+        self.size = size
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(Database(path, connect(path, check_same_thread=False)))
+
+    @contextmanager
+    def connection(self, timeout=None):
+        db = self.idle.get(timeout=timeout)
+        try:
+            yield db
+        finally:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            self.idle.put(db)
+
+    def close(self):
+        for _ in range(self.size):
+            self.idle.get().close()
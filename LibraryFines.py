@@ -0,0 +1,223 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from LibraryDatabase import DB_PATH, Database
+from LibraryMigrations import migrate
+
+# Nightly overdue fine accrual.
+#
+# Fines are computed in SQL from issues.return_date (the due date) against a
+# cutoff date and upserted into transactions as one accrued row per issue.
+# A run only looks at
+#   1. issues changed since the last run (issues.updated_seq above the stored
+#      watermark), whose fine may also shrink or go away, and
+#   2. issues still out and overdue at the cutoff, whose fine grows each day.
+# Work is done in chunks, and each chunk commits together with the run's
+# cursor in fine_accrual_state, so an interrupted run picks up where it left
+# off. Payments are kept in transactions.paid_amount: a fine that grows after
+# it was paid is owed again only for the growth.
+
+FINE_PER_DAY = 0.50
+CHUNK_SIZE = 50000
+
+# Overdue days run from the due date to the return date, or to the cutoff if
+# the book is still out or came back after it
+_ACCRUE = '''
+    INSERT INTO transactions (issue_id, user_id, fine, paid, accrued)
+    SELECT i.id, i.user_id,
+           ROUND((julianday(MIN(COALESCE(i.returned_date, :cutoff), :cutoff)) - julianday(i.return_date)) * :rate, 2),
+           0, 1
+    FROM issues i
+    WHERE i.id IN ({chunk})
+      AND i.return_date < MIN(COALESCE(i.returned_date, :cutoff), :cutoff)
+    ON CONFLICT(issue_id) WHERE accrued = 1 DO UPDATE SET
+        fine = excluded.fine,
+        paid = excluded.fine <= transactions.paid_amount
+    WHERE excluded.fine <> transactions.fine
+'''
+# A changed issue that is no longer overdue at the cutoff (its due date was
+# extended, or it came back on time after all) loses its accrued fine. Paid
+# fines are left alone, and a partly paid one is closed at what was paid.
+_NOT_OVERDUE = '''
+    SELECT i.id FROM issues i
+    WHERE i.id IN ({chunk})
+      AND i.return_date >= MIN(COALESCE(i.returned_date, :cutoff), :cutoff)
+'''
+_CLEAR = '''
+    DELETE FROM transactions
+    WHERE accrued = 1 AND paid = 0 AND paid_amount = 0 AND issue_id IN ({not_overdue})
+'''
+_CLOSE = '''
+    UPDATE transactions SET fine = paid_amount, paid = 1
+    WHERE accrued = 1 AND paid = 0 AND paid_amount > 0 AND issue_id IN ({not_overdue})
+'''
+_CHANGED_CHUNK = '''
+    SELECT id FROM issues
+    WHERE updated_seq > :cursor_seq AND updated_seq <= :run_high
+    ORDER BY updated_seq LIMIT :limit
+'''
+_OVERDUE_CHUNK = '''
+    SELECT id FROM issues
+    WHERE returned_date IS NULL AND return_date < :cutoff
+      AND (return_date > :cursor_due OR (return_date = :cursor_due AND id > :cursor_id))
+    ORDER BY return_date, id LIMIT :limit
+'''
+
+
+def _state(db):
+    row = db.query_one("SELECT watermark, last_cutoff, run_cutoff, run_high, phase, "
+                       "cursor_seq, cursor_due, cursor_id FROM fine_accrual_state WHERE id = 1")
+    keys = ("watermark", "last_cutoff", "run_cutoff", "run_high", "phase", "cursor_seq", "cursor_due", "cursor_id")
+    return dict(zip(keys, row))
+
+
+def _start_run(db, cutoff):
+    with db.transaction():
+        state = _state(db)
+        run_high = db.query_one("SELECT value FROM change_counter WHERE name = 'issues'")[0]
+        db.execute("UPDATE fine_accrual_state SET run_cutoff = ?, run_high = ?, phase = 'changed', "
+                   "cursor_seq = ?, cursor_due = '', cursor_id = 0 WHERE id = 1",
+                   (cutoff, run_high, state["watermark"]))
+
+
+# Function to process one chunk of a phase; returns the number of issues examined
+def _run_chunk(db, state, rate, chunk_size):
+    params = {"cutoff": state["run_cutoff"], "rate": rate, "limit": chunk_size,
+              "run_high": state["run_high"], "cursor_seq": state["cursor_seq"],
+              "cursor_due": state["cursor_due"], "cursor_id": state["cursor_id"]}
+    with db.transaction():
+        if state["phase"] == "changed":
+            last = db.query_one(f"SELECT COUNT(*), MAX(updated_seq) FROM issues WHERE id IN ({_CHANGED_CHUNK})", params)
+            count = last[0]
+            if count:
+                not_overdue = _NOT_OVERDUE.format(chunk=_CHANGED_CHUNK)
+                db.execute(_CLEAR.format(not_overdue=not_overdue), params)
+                db.execute(_CLOSE.format(not_overdue=not_overdue), params)
+                db.execute(_ACCRUE.format(chunk=_CHANGED_CHUNK), params)
+                db.execute("UPDATE fine_accrual_state SET cursor_seq = ? WHERE id = 1", (last[1],))
+            elif state["last_cutoff"] is not None and state["run_cutoff"] <= state["last_cutoff"]:
+                # Open loans have not aged since the last run, so phase 2 is a no-op
+                db.execute("UPDATE fine_accrual_state SET phase = 'done' WHERE id = 1")
+            else:
+                db.execute("UPDATE fine_accrual_state SET phase = 'overdue' WHERE id = 1")
+        else:
+            last = db.query_one(f"SELECT return_date, id FROM issues WHERE id IN ({_OVERDUE_CHUNK}) "
+                                "ORDER BY return_date DESC, id DESC LIMIT 1", params)
+            count = 0
+            if last is not None:
+                count = db.query_one(f"SELECT COUNT(*) FROM ({_OVERDUE_CHUNK})", params)[0]
+                db.execute(_ACCRUE.format(chunk=_OVERDUE_CHUNK), params)
+                db.execute("UPDATE fine_accrual_state SET cursor_due = ?, cursor_id = ? WHERE id = 1", last)
+            else:
+                db.execute("UPDATE fine_accrual_state SET phase = 'done' WHERE id = 1")
+    return count
+
+
+def _finish_run(db):
+    with db.transaction():
+        db.execute("UPDATE fine_accrual_state SET watermark = run_high, last_cutoff = run_cutoff, "
+                   "run_cutoff = NULL, run_high = NULL, phase = NULL, cursor_seq = NULL, "
+                   "cursor_due = NULL, cursor_id = NULL WHERE id = 1")
+
+
+def accrue_fines(db, cutoff=None, rate=FINE_PER_DAY, chunk_size=CHUNK_SIZE, progress=None):
+    """Bring accrued fines up to date as of cutoff (YYYY-MM-DD, default today).
+
+    An unfinished earlier run is completed first. Returns the number of
+    issues examined. progress, if given, is called as progress(rows, seconds)
+    after every chunk.
+    """
+    cutoff = cutoff or datetime.now().strftime('%Y-%m-%d')
+    start = time.perf_counter()
+    processed = 0
+    while True:
+        state = _state(db)
+        if state["phase"] is None:
+            if state["last_cutoff"] == cutoff and state["watermark"] == db.query_one(
+                    "SELECT value FROM change_counter WHERE name = 'issues'")[0]:
+                break
+            _start_run(db, cutoff)
+            continue
+        if state["phase"] == "done":
+            _finish_run(db)
+            if state["run_cutoff"] == cutoff:
+                break
+            continue
+        processed += _run_chunk(db, state, rate, chunk_size)
+        if progress is not None:
+            progress(processed, time.perf_counter() - start)
+    return processed
+
+
+# Function to check that a fine growing after payment only bills the new days;
+# raises AssertionError on a mismatch
+def self_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "fines.db"))
+        migrate(db.conn)
+
+        def outstanding():
+            return db.query_one("SELECT COALESCE(SUM(outstanding), 0) FROM fine_summary")[0]
+
+        def accrued(issue_id):
+            return db.query_one("SELECT fine, paid, paid_amount FROM transactions "
+                                "WHERE accrued = 1 AND issue_id = ?", (issue_id,))
+
+        # Seed issue 1 is due 2024-08-15: 17 days late at 2024-09-01
+        accrue_fines(db, '2024-09-01')
+        if accrued(1) != (8.5, 0, 0.0):
+            raise AssertionError(f"accrued fine at 2024-09-01 is {accrued(1)}, expected 8.5 unpaid")
+        with db.transaction():
+            db.execute("UPDATE transactions SET paid = 1 WHERE accrued = 1 AND issue_id = 1")
+        before = outstanding()
+        accrue_fines(db, '2024-09-02')
+        grown = round(outstanding() - before, 2)
+        # One more day on each of the three overdue seed issues, 8.5 already paid
+        if accrued(1) != (9.0, 0, 8.5) or grown != 3 * FINE_PER_DAY:
+            raise AssertionError(f"after payment: fine {accrued(1)}, outstanding grew by {grown}, "
+                                 f"expected (9.0, 0, 8.5) and {3 * FINE_PER_DAY}")
+        with db.transaction():
+            db.execute("UPDATE issues SET return_date = '2024-12-31' WHERE id = 1")
+        accrue_fines(db, '2024-09-03')
+        if accrued(1) != (8.5, 1, 8.5):
+            raise AssertionError(f"after extending the due date: fine {accrued(1)}, expected closed at 8.5 paid")
+        expected = db.query_one("SELECT SUM(fine - paid_amount) FROM transactions WHERE paid = 0")[0]
+        if round(outstanding(), 2) != round(expected, 2):
+            raise AssertionError(f"fine_summary outstanding {outstanding()} != transactions total {expected}")
+        db.close()
+    print("Self-test passed: payments carry over when a fine grows")
+
+
+def print_progress(rows, seconds):
+    rate = rows / seconds if seconds else 0.0
+    print(f"{rows} issues processed in {seconds:.1f}s ({rate:.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accrue overdue fines into the transactions table.")
+    parser.add_argument("--db", default=DB_PATH, help="database file")
+    parser.add_argument("--cutoff", help="accrue fines up to this date (YYYY-MM-DD, default today)")
+    parser.add_argument("--rate", type=float, default=FINE_PER_DAY, help="fine per overdue day")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="issues per committed chunk")
+    parser.add_argument("--test", action="store_true", help="check accrual against payments on a temporary database")
+    args = parser.parse_args()
+
+    if args.test:
+        self_test()
+        return
+
+    db = Database(args.db)
+    migrate(db.conn)
+    start = time.perf_counter()
+    rows = accrue_fines(db, args.cutoff, args.rate, args.chunk_size, progress=print_progress)
+    seconds = time.perf_counter() - start
+    db.close()
+    rate = rows / seconds if seconds else 0.0
+    print(f"Done: {rows} issues in {seconds:.2f}s ({rate:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from LibraryDatabase import DB_PATH, connect
+from LibraryMigrations import migrate
+from LibrarySearch import index_new_books
+
+# Streaming bulk import of book catalogs.
+#
+# Rows are read lazily from CSV (header with title, author and optionally
+# book_id and available) or JSON Lines (objects with the same keys), inserted
+# with executemany in fixed-size batches and committed in large transactions,
+# so memory use does not depend on the size of the file. Rows that cannot be
+# read (missing fields, a bad book_id or available value) are skipped and
+# counted rather than stopping the import.
+
+BATCH_SIZE = 50000
+COMMIT_EVERY = 500000
+PROGRESS_EVERY = 100000
+AVAILABLE_VALUES = {"1": 1, "true": 1, "yes": 1, "y": 1, "t": 1, "available": 1,
+                    "0": 0, "false": 0, "no": 0, "n": 0, "f": 0, "issued": 0}
+
+
+def _read_csv(file):
+    reader = csv.reader(file)
+    header = [name.strip().lower() for name in next(reader)]
+    for field in ("title", "author"):
+        if field not in header:
+            raise ValueError(f"CSV header is missing the '{field}' column")
+    title = header.index("title")
+    author = header.index("author")
+    book_id = header.index("book_id") if "book_id" in header else None
+    available = header.index("available") if "available" in header else None
+    for row in reader:
+        if not row:
+            continue
+        try:
+            yield (row[book_id] if book_id is not None else None,
+                   row[title], row[author],
+                   row[available] if available is not None else 1)
+        except IndexError:
+            yield None
+
+
+def _read_jsonl(file):
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield record.get("book_id"), record["title"], record["author"], record.get("available", 1)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            yield None
+
+
+READERS = {"csv": _read_csv, "jsonl": _read_jsonl}
+
+
+# Function to turn an available cell into 0 or 1: blank means available,
+# and yes/no, true/false and 1/0 are accepted; anything else is a ValueError
+def parse_available(value):
+    if value is None:
+        return 1
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return int(value)
+    text = str(value).strip().lower()
+    if not text:
+        return 1
+    if text not in AVAILABLE_VALUES:
+        raise ValueError(f"unrecognised available value {value!r}")
+    return AVAILABLE_VALUES[text]
+
+
+# Function to fill in missing book_ids from a running counter, counting bad rows in skipped[0]
+def _assign_ids(rows, next_id, skipped):
+    for row in rows:
+        try:
+            book_id, title, author, available = row
+            available = parse_available(available)
+            book_id = next_id if book_id in (None, "") else int(book_id)
+            if title is None or author is None:
+                raise ValueError("title and author are required")
+        except (TypeError, ValueError):
+            skipped[0] += 1
+            continue
+        next_id = max(next_id, book_id + 1)
+        yield book_id, title, author, available
+
+
+def _deferrable_objects(conn):
+    # Secondary indexes and triggers (the full-text index is kept in sync by
+    # triggers); UNIQUE constraints have no SQL and must stay
+    return conn.execute("SELECT type, name, sql FROM sqlite_master "
+                        "WHERE type IN ('index', 'trigger') AND tbl_name='books' AND sql IS NOT NULL").fetchall()
+
+
+def _fts_insert_trigger(conn):
+    # Indexing row by row through this trigger is several times slower than
+    # one index_new_books pass, so every import suspends it
+    return conn.execute("SELECT type, name, sql FROM sqlite_master "
+                        "WHERE type = 'trigger' AND name = 'books_fts_insert'").fetchall()
+
+
+def import_catalog(path, db_path=DB_PATH, fmt=None, batch_size=BATCH_SIZE,
+                   defer_indexes=False, progress=None):
+    """Stream a catalog file into books and return (rows imported, rows skipped).
+
+    progress, if given, is called as progress(rows, seconds) roughly every
+    PROGRESS_EVERY rows and once at the end.
+    """
+    if fmt is None:
+        fmt = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    conn = connect(db_path)
+    migrate(conn)
+
+    start = time.perf_counter()
+    imported = 0
+    skipped = [0]
+    reported = 0
+    dropped = []
+    try:
+        next_id = conn.execute("SELECT COALESCE(MAX(book_id), 0) + 1 FROM books").fetchone()[0]
+        last_row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM books").fetchone()[0]
+        conn.execute("BEGIN")
+        dropped = _deferrable_objects(conn) if defer_indexes else _fts_insert_trigger(conn)
+        for kind, name, _ in dropped:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            rows = _assign_ids(READERS[fmt](file), next_id, skipped)
+            uncommitted = 0
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                conn.executemany("INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)", batch)
+                imported += len(batch)
+                uncommitted += len(batch)
+                if uncommitted >= COMMIT_EVERY:
+                    conn.commit()
+                    conn.execute("BEGIN")
+                    uncommitted = 0
+                if progress is not None and imported - reported >= PROGRESS_EVERY:
+                    progress(imported, time.perf_counter() - start)
+                    reported = imported
+
+        if dropped:
+            index_new_books(conn, last_row)
+            for _, _, sql in dropped:
+                conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        # Rows committed before the failure stay; index them and put back
+        # anything that was dropped
+        if dropped:
+            conn.execute("BEGIN")
+            index_new_books(conn, last_row)
+            existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master")}
+            for _, name, sql in dropped:
+                if name not in existing:
+                    conn.execute(sql)
+            conn.commit()
+        raise
+    finally:
+        conn.close()
+    if progress is not None:
+        progress(imported, time.perf_counter() - start)
+    return imported, skipped[0]
+
+
+def print_progress(rows, seconds):
+    rate = rows / seconds if seconds else 0.0
+    print(f"{rows} rows in {seconds:.1f}s ({rate:.0f} rows/s)", file=sys.stderr)
+
+
+# Function to write a synthetic CSV catalog for benchmarking
+def write_sample_catalog(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["title", "author"])
+        for i in range(rows):
+            writer.writerow([f"Sample Title {i}", f"Author {i % 50000}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import a book catalog into the library database.")
+    parser.add_argument("path", nargs="?", help="CSV or JSON Lines catalog file")
+    parser.add_argument("--db", default=DB_PATH, help="database file")
+    parser.add_argument("--format", choices=sorted(READERS), help="input format (default: from extension)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per executemany call")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop books indexes and search triggers, rebuild at the end")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="import N synthetic rows into a temporary database")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = os.path.join(tmp, "catalog.csv")
+            write_sample_catalog(catalog, args.benchmark)
+            start = time.perf_counter()
+            rows, _ = import_catalog(catalog, os.path.join(tmp, "import.db"), batch_size=args.batch_size,
+                                     defer_indexes=args.defer_indexes, progress=print_progress)
+            seconds = time.perf_counter() - start
+        print(f"Imported {rows} rows in {seconds:.2f}s ({rows / seconds:.0f} rows/s)")
+        return
+
+    if not args.path:
+        parser.error("a catalog path is required unless --benchmark is given")
+    rows, skipped = import_catalog(args.path, args.db, args.format, args.batch_size,
+                                   args.defer_indexes, progress=print_progress)
+    print(f"Imported {rows} books ({skipped} bad rows skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import LibraryService as service
+from LibraryDatabase import ConnectionPool, connect
+from LibraryMigrations import migrate
+
+# Load generator for the library service layer.
+#
+# Simulated patrons run in threads and share a small ConnectionPool, mixing
+# logins, issues, returns and book additions against a generated catalog.
+# Latency is measured from asking the pool for a connection to the end of the
+# operation, so it includes time spent queueing for a connection and waiting
+# on SQLite's write lock. Lock contention is reported as the time writes spend
+# in BEGIN IMMEDIATE: with busy_timeout set, a writer waits there instead of
+# getting a "database is locked" error.
+
+OPERATION_MIX = (("login", 0.2), ("issue", 0.35), ("return", 0.35), ("add_book", 0.1))
+FIRST_ID = 1000
+MAX_RETRIES = 5
+
+
+# Function to build a database with the given catalog and patron counts
+def prepare_database(path, books, users):
+    conn = connect(path)
+    migrate(conn)
+    with conn:
+        conn.executemany("INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, 1)",
+                         ((FIRST_ID + i, f"Title {i}", f"Author {i % 1000}") for i in range(books)))
+        conn.executemany("INSERT INTO users (user_id, username, password, role) VALUES (?, ?, ?, 'user')",
+                         ((FIRST_ID + i, f"patron{i}", f"pw{i}") for i in range(users)))
+    conn.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.pool_waits = []
+        self.lock_waits = []
+        self.statuses = defaultdict(int)
+        self.lock_errors = 0
+        self.failures = 0
+
+    def merge(self, latencies, pool_waits, lock_waits, statuses, lock_errors, failures):
+        with self.lock:
+            for name, values in latencies.items():
+                self.latencies[name].extend(values)
+            self.pool_waits.extend(pool_waits)
+            self.lock_waits.extend(lock_waits)
+            for status, count in statuses.items():
+                self.statuses[status] += count
+            self.lock_errors += lock_errors
+            self.failures += failures
+
+
+def _is_lock_error(exc):
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def _patron(pool, stats, seed, deadline, books, users):
+    rng = random.Random(seed)
+    names = [name for name, _ in OPERATION_MIX]
+    weights = [weight for _, weight in OPERATION_MIX]
+    patron = rng.randrange(users)
+    held = []
+    latencies = defaultdict(list)
+    pool_waits = []
+    lock_waits = []
+    statuses = defaultdict(int)
+    lock_errors = 0
+    failures = 0
+
+    while time.perf_counter() < deadline:
+        operation = rng.choices(names, weights)[0]
+        if operation == "return" and not held:
+            operation = "issue"
+        book_id = held.pop() if operation == "return" else FIRST_ID + rng.randrange(books)
+
+        start = time.perf_counter()
+        with pool.connection() as db:
+            pool_waits.append(time.perf_counter() - start)
+            waited = db.lock_wait
+            for attempt in range(MAX_RETRIES):
+                try:
+                    if operation == "login":
+                        result = "ok" if service.login(db, f"patron{patron}", f"pw{patron}") else "denied"
+                    elif operation == "issue":
+                        result = service.issue_book(db, book_id, FIRST_ID + patron)
+                        if result == "issued":
+                            held.append(book_id)
+                    elif operation == "return":
+                        result = service.return_book(db, book_id)
+                    else:
+                        service.add_book(db, f"New title {rng.random()}", "Load Test")
+                        result = "added"
+                    break
+                except sqlite3.OperationalError as exc:
+                    if not _is_lock_error(exc):
+                        raise
+                    lock_errors += 1
+                    time.sleep(0.001 * 2 ** attempt)
+            else:
+                result = "failed"
+                failures += 1
+            if operation != "login":
+                lock_waits.append(db.lock_wait - waited)
+        latencies[operation].append(time.perf_counter() - start)
+        statuses[result] += 1
+
+    stats.merge(latencies, pool_waits, lock_waits, statuses, lock_errors, failures)
+
+
+def run_load(path, patrons=16, workers=4, seconds=10.0, books=100000, users=10000):
+    """Drive the service from patrons threads over a pool of workers connections."""
+    stats = LoadStats()
+    pool = ConnectionPool(path, workers)
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=_patron, args=(pool, stats, seed, deadline, books, users))
+               for seed in range(patrons)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - start
+    pool.close()
+    return stats
+
+
+def _percentile_ms(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return 1000 * values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def print_report(stats, patrons, workers):
+    total = sum(len(values) for values in stats.latencies.values())
+    print(f"{patrons} patrons over {workers} connections for {stats.elapsed:.1f}s")
+    print(f"Throughput: {total / stats.elapsed:.0f} ops/s ({total} operations)")
+    for name, _ in OPERATION_MIX:
+        values = stats.latencies.get(name, [])
+        print(f"  {name:<9} n={len(values):<7} p50 {_percentile_ms(values, 50):7.2f} ms"
+              f"   p99 {_percentile_ms(values, 99):7.2f} ms")
+    print(f"Pool wait: p50 {_percentile_ms(stats.pool_waits, 50):.2f} ms, "
+          f"p99 {_percentile_ms(stats.pool_waits, 99):.2f} ms")
+    waits = stats.lock_waits
+    writes = [value for name in ("issue", "return", "add_book") for value in stats.latencies.get(name, [])]
+    share = sum(waits) / sum(writes) if writes else 0.0
+    print(f"Write lock wait (BEGIN IMMEDIATE): p50 {_percentile_ms(waits, 50):.2f} ms, "
+          f"p99 {_percentile_ms(waits, 99):.2f} ms, {share:.0%} of write latency")
+    print(f"SQLite lock errors (retried): {stats.lock_errors}, gave up: {stats.failures}")
+    print("Results: " + ", ".join(f"{status}={count}" for status, count in sorted(stats.statuses.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the library service with simulated patrons.")
+    parser.add_argument("--patrons", type=int, default=16, help="concurrent simulated patrons (threads)")
+    parser.add_argument("--workers", type=int, default=4, help="database connections in the pool")
+    parser.add_argument("--seconds", type=float, default=10.0, help="test duration")
+    parser.add_argument("--books", type=int, default=100000, help="books in the generated catalog")
+    parser.add_argument("--users", type=int, default=10000, help="patrons in the users table")
+    parser.add_argument("--db", help="existing database prepared by a previous run (default: temporary)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db
+        if path is None:
+            path = os.path.join(tmp, "load.db")
+            prepare_database(path, args.books, args.users)
+        stats = run_load(path, args.patrons, args.workers, args.seconds, args.books, args.users)
+    print_report(stats, args.patrons, args.workers)
+
+
+if __name__ == "__main__":
+    main()
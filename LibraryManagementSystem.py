@@ -1,83 +1,20 @@
-import sqlite3
 import tkinter as tk
 from tkinter import messagebox
-from datetime import datetime, timedelta
+
+import LibraryService as service
+from LibraryCirculation import ISSUED, MESSAGES, RETURNED
+from LibraryDatabase import DB_PATH, connect
+from LibraryMigrations import migrate
+from LibrarySearch import PAGE_SIZE, RESULTS_CHANGED, searchable
+from LibraryWorker import DatabaseWorker
+
+SEARCH_DELAY = 250  # milliseconds of typing pause before a search runs
 
 # Database Setup
-def setup_database():
-    conn = sqlite3.connect('library.db')
-    cursor = conn.cursor()
-
-    # Drop tables if they exist to avoid conflicts
-    cursor.execute('DROP TABLE IF EXISTS users')
-    cursor.execute('DROP TABLE IF EXISTS books')
-    cursor.execute('DROP TABLE IF EXISTS issues')
-    cursor.execute('DROP TABLE IF EXISTS transactions')
-
-    # Recreate tables with user_id and book_id
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER UNIQUE,
-            username TEXT NOT NULL UNIQUE,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL -- "admin" or "user"
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER UNIQUE,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            available BOOLEAN DEFAULT 1
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS issues (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER,
-            user_id INTEGER,
-            issue_date TEXT,
-            return_date TEXT,
-            FOREIGN KEY(book_id) REFERENCES books(book_id),
-            FOREIGN KEY(user_id) REFERENCES users(user_id)
-        )
-    ''')
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            issue_id INTEGER,
-            fine REAL DEFAULT 0,
-            paid BOOLEAN DEFAULT 0,
-            FOREIGN KEY(issue_id) REFERENCES issues(id)
-        )
-    ''')
-
-    # Insert predefined data
-    cursor.executescript('''
-        INSERT OR IGNORE INTO users (username, password, role, user_id) VALUES
-            ('admin', 'adminpass', 'admin', 1),
-            ('user1', 'userpass', 'user', 2),
-            ('user2', 'user2pass', 'user', 3);
-
-        INSERT OR IGNORE INTO books (title, author, available, book_id) VALUES
-            ('The Great Gatsby', 'F. Scott Fitzgerald', 1, 101),
-            ('To Kill a Mockingbird', 'Harper Lee', 1, 102),
-            ('1984', 'George Orwell', 1, 103),
-            ('Moby Dick', 'Herman Melville', 1, 104);
-
-        INSERT OR IGNORE INTO issues (book_id, user_id, issue_date, return_date) VALUES
-            (101, 2, '2024-08-01', '2024-08-15'),
-            (102, 3, '2024-07-15', '2024-08-10'),
-            (103, 2, '2024-07-20', '2024-08-25');
-
-        INSERT OR IGNORE INTO transactions (issue_id, fine, paid) VALUES
-            (1, 10.00, 0),
-            (2, 0.00, 1);
-    ''')
-
-    conn.commit()
+def setup_database(path=DB_PATH):
+    # Upgrade the schema in place; existing data is kept across launches
+    conn = connect(path)
+    migrate(conn)
     conn.close()
 
 # Main Application Class
@@ -85,21 +22,36 @@ class LibraryApp(tk.Tk):
     def __init__(self):
         tk.Tk.__init__(self)
         self.title("Library Management System")
-        self.geometry("400x300")
+        self.geometry("400x320")
+        self.worker = DatabaseWorker(self, on_busy=self.show_busy)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.frames = {}
 
-        for F in (LoginPage, AdminPage, UserPage, AddBookPage, IssueBookPage, ReturnBookPage, ReportsPage):
+        for F in (LoginPage, AdminPage, UserPage, AddBookPage, IssueBookPage, ReturnBookPage, SearchPage, ReportsPage):
             page_name = F.__name__
             frame = F(parent=self, controller=self)
             self.frames[page_name] = frame
             frame.grid(row=0, column=0, sticky="nsew")
 
+        self.status_label = tk.Label(self, text="", fg="gray")
+        self.status_label.grid(row=1, column=0, sticky="w")
+
         self.show_frame("LoginPage")
 
     def show_frame(self, page_name):
         frame = self.frames[page_name]
+        if hasattr(frame, "on_show"):
+            frame.on_show()
         frame.tkraise()
 
+    def show_busy(self, pending):
+        self.status_label.config(text="Working..." if pending else "")
+        self.config(cursor="watch" if pending else "")
+
+    def on_close(self):
+        self.worker.close()
+        self.destroy()
+
 # Login Page
 class LoginPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -124,11 +76,9 @@ class LoginPage(tk.Frame):
         username = self.username_entry.get()
         password = self.password_entry.get()
 
-        conn = sqlite3.connect('library.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, role FROM users WHERE username=? AND password=?", (username, password))
-        user = cursor.fetchone()
+        self.controller.worker.submit(lambda db: service.login(db, username, password), self.on_login, key="login")
 
+    def on_login(self, user):
         if user:
             user_id, role = user
             self.controller.user_id = user_id
@@ -138,7 +88,6 @@ class LoginPage(tk.Frame):
                 self.controller.show_frame("UserPage")
         else:
             messagebox.showerror("Login Failed", "Invalid credentials")
-        conn.close()
 
 # Admin Homepage
 class AdminPage(tk.Frame):
@@ -158,6 +107,9 @@ class AdminPage(tk.Frame):
         return_book_btn = tk.Button(self, text="Return Book", command=lambda: controller.show_frame("ReturnBookPage"))
         return_book_btn.pack(pady=5)
 
+        search_btn = tk.Button(self, text="Search Catalog", command=lambda: controller.show_frame("SearchPage"))
+        search_btn.pack(pady=5)
+
         reports_btn = tk.Button(self, text="Reports", command=lambda: controller.show_frame("ReportsPage"))
         reports_btn.pack(pady=5)
 
@@ -179,6 +131,9 @@ class UserPage(tk.Frame):
         return_book_btn = tk.Button(self, text="Return Book", command=lambda: controller.show_frame("ReturnBookPage"))
         return_book_btn.pack(pady=5)
 
+        search_btn = tk.Button(self, text="Search Catalog", command=lambda: controller.show_frame("SearchPage"))
+        search_btn.pack(pady=5)
+
         reports_btn = tk.Button(self, text="Reports", command=lambda: controller.show_frame("ReportsPage"))
         reports_btn.pack(pady=5)
 
@@ -212,13 +167,9 @@ class AddBookPage(tk.Frame):
         title = self.title_entry.get()
         author = self.author_entry.get()
 
-        conn = sqlite3.connect('library.db')
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO books (title, author, available) VALUES (?, ?, ?)", (title, author, True))
-        conn.commit()
-
-        messagebox.showinfo("Success", f"Book '{title}' added successfully!")
-        conn.close()
+        self.controller.worker.submit(lambda db: service.add_book(db, title, author),
+                                      lambda book_id: messagebox.showinfo(
+                                          "Success", f"Book '{title}' added successfully with ID {book_id}!"))
 
 # Issue Book Page
 class IssueBookPage(tk.Frame):
@@ -247,24 +198,13 @@ class IssueBookPage(tk.Frame):
         book_id = self.book_id_entry.get()
         user_id = self.user_id_entry.get()
 
-        conn = sqlite3.connect('library.db')
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT available FROM books WHERE book_id=?", (book_id,))
-        book = cursor.fetchone()
+        self.controller.worker.submit(lambda db: service.issue_book(db, book_id, user_id), self.on_issued)
 
-        if book and book[0]:
-            issue_date = datetime.now().strftime('%Y-%m-%d')
-            return_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
-            cursor.execute("INSERT INTO issues (book_id, user_id, issue_date, return_date) VALUES (?, ?, ?, ?)", 
-                           (book_id, user_id, issue_date, return_date))
-            cursor.execute("UPDATE books SET available=0 WHERE book_id=?", (book_id,))
-            conn.commit()
-            messagebox.showinfo("Success", "Book issued successfully!")
+    def on_issued(self, status):
+        if status == ISSUED:
+            messagebox.showinfo("Success", MESSAGES[status])
         else:
-            messagebox.showerror("Error", "Book is not available")
-        
-        conn.close()
+            messagebox.showerror("Error", MESSAGES[status])
 
 # Return Book Page
 class ReturnBookPage(tk.Frame):
@@ -288,21 +228,87 @@ class ReturnBookPage(tk.Frame):
     def return_book(self):
         book_id = self.book_id_entry.get()
 
-        conn = sqlite3.connect('library.db')
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id FROM issues WHERE book_id=? AND return_date IS NOT NULL", (book_id,))
-        issue = cursor.fetchone()
+        self.controller.worker.submit(lambda db: service.return_book(db, book_id), self.on_returned)
 
-        if issue:
-            cursor.execute("UPDATE books SET available=1 WHERE book_id=?", (book_id,))
-            cursor.execute("DELETE FROM issues WHERE book_id=?", (book_id,))
-            conn.commit()
-            messagebox.showinfo("Success", "Book returned successfully!")
+    def on_returned(self, status):
+        if status == RETURNED:
+            messagebox.showinfo("Success", MESSAGES[status])
         else:
-            messagebox.showerror("Error", "No record of this book being issued")
-        
-        conn.close()
+            messagebox.showerror("Error", MESSAGES[status])
+
+# Search Page
+class SearchPage(tk.Frame):
+    def __init__(self, parent, controller):
+        tk.Frame.__init__(self, parent)
+        self.controller = controller
+        self.pending_search = None
+        self.cursors = [None]  # keyset cursor for the start of each page seen
+        self.next_cursor = None
+
+        label = tk.Label(self, text="Search Catalog", font=("Arial", 16))
+        label.pack(pady=10)
+
+        self.query_entry = tk.Entry(self, width=40)
+        self.query_entry.pack()
+        self.query_entry.bind("<KeyRelease>", self.schedule_search)
+
+        self.results_list = tk.Listbox(self, width=55, height=PAGE_SIZE // 2)
+        self.results_list.pack(pady=5)
+
+        nav = tk.Frame(self)
+        nav.pack()
+        self.prev_btn = tk.Button(nav, text="Previous", command=self.previous_page, state=tk.DISABLED)
+        self.prev_btn.pack(side=tk.LEFT, padx=5)
+        self.next_btn = tk.Button(nav, text="Next", command=self.next_page, state=tk.DISABLED)
+        self.next_btn.pack(side=tk.LEFT, padx=5)
+
+        back_btn = tk.Button(self, text="Back", command=lambda: controller.show_frame("AdminPage"))
+        back_btn.pack(pady=5)
+
+    def schedule_search(self, event=None):
+        # Debounce: only search once the user pauses typing, and not while
+        # any word is a single letter, which matches most of the catalog
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+            self.pending_search = None
+        if not searchable(self.query_entry.get()):
+            self.cursors = [None]
+            self.on_results(([], None))
+            return
+        self.pending_search = self.after(SEARCH_DELAY, self.new_search)
+
+    def new_search(self):
+        self.pending_search = None
+        self.cursors = [None]
+        self.show_page()
+
+    def next_page(self):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+            self.show_page()
+
+    def previous_page(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self.show_page()
+
+    def show_page(self):
+        text = self.query_entry.get()
+        after = self.cursors[-1]
+        self.controller.worker.submit(lambda db: service.search(db, text, after), self.on_results, key="search")
+
+    def on_results(self, result):
+        rows, self.next_cursor = result
+        if self.next_cursor == RESULTS_CHANGED:
+            messagebox.showinfo("Search", "The results changed while paging; showing the first page again.")
+            self.new_search()
+            return
+        self.results_list.delete(0, tk.END)
+        for book_id, title, author, available in rows:
+            status = "Available" if available else "Issued"
+            self.results_list.insert(tk.END, f"{book_id}: {title} by {author} ({status})")
+        self.prev_btn.config(state=tk.NORMAL if len(self.cursors) > 1 else tk.DISABLED)
+        self.next_btn.config(state=tk.NORMAL if self.next_cursor is not None else tk.DISABLED)
 
 # Reports Page
 class ReportsPage(tk.Frame):
@@ -313,9 +319,24 @@ class ReportsPage(tk.Frame):
         label = tk.Label(self, text="Reports", font=("Arial", 16))
         label.pack(pady=10)
 
+        self.report_text = tk.Text(self, width=55, height=10)
+        self.report_text.pack()
+
+        refresh_btn = tk.Button(self, text="Refresh", command=self.on_show)
+        refresh_btn.pack(pady=5)
+
         back_btn = tk.Button(self, text="Back", command=lambda: controller.show_frame("AdminPage"))
         back_btn.pack()
 
+    def on_show(self):
+        self.controller.worker.submit(service.reports, self.on_report, key="reports")
+
+    def on_report(self, lines):
+        self.report_text.config(state=tk.NORMAL)
+        self.report_text.delete("1.0", tk.END)
+        self.report_text.insert(tk.END, "\n".join(lines))
+        self.report_text.config(state=tk.DISABLED)
+
 # Main Execution
 if __name__ == "__main__":
     setup_database()
@@ -0,0 +1,409 @@
+# Versioned schema migrations for library.db.
+#
+# The schema version is kept in SQLite's PRAGMA user_version. Each migration
+# runs once, inside its own transaction, and bumps the version when it
+# commits; a database that is already current costs a single PRAGMA read.
+
+
+def _create_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL -- "admin" or "user"
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER UNIQUE,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            available BOOLEAN DEFAULT 1
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS issues (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER,
+            user_id INTEGER,
+            issue_date TEXT,
+            return_date TEXT,
+            FOREIGN KEY(book_id) REFERENCES books(book_id),
+            FOREIGN KEY(user_id) REFERENCES users(user_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            issue_id INTEGER,
+            fine REAL DEFAULT 0,
+            paid BOOLEAN DEFAULT 0,
+            FOREIGN KEY(issue_id) REFERENCES issues(id)
+        )
+    ''')
+
+    # Predefined data; databases created before versioning already have it
+    conn.executemany("INSERT OR IGNORE INTO users (username, password, role, user_id) VALUES (?, ?, ?, ?)", [
+        ('admin', 'adminpass', 'admin', 1),
+        ('user1', 'userpass', 'user', 2),
+        ('user2', 'user2pass', 'user', 3),
+    ])
+    conn.executemany("INSERT OR IGNORE INTO books (title, author, available, book_id) VALUES (?, ?, ?, ?)", [
+        ('The Great Gatsby', 'F. Scott Fitzgerald', 1, 101),
+        ('To Kill a Mockingbird', 'Harper Lee', 1, 102),
+        ('1984', 'George Orwell', 1, 103),
+        ('Moby Dick', 'Herman Melville', 1, 104),
+    ])
+    if conn.execute("SELECT 1 FROM issues LIMIT 1").fetchone() is None:
+        conn.executemany("INSERT INTO issues (book_id, user_id, issue_date, return_date) VALUES (?, ?, ?, ?)", [
+            (101, 2, '2024-08-01', '2024-08-15'),
+            (102, 3, '2024-07-15', '2024-08-10'),
+            (103, 2, '2024-07-20', '2024-08-25'),
+        ])
+        conn.executemany("INSERT INTO transactions (issue_id, fine, paid) VALUES (?, ?, ?)", [
+            (1, 10.00, 0),
+            (2, 0.00, 1),
+        ])
+
+
+def _create_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_book_id ON issues(book_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_user_id ON issues(user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_login ON users(username, password)")
+
+
+def _create_books_fts(conn):
+    # External-content FTS5 index over books; the prefix indexes keep short
+    # as-you-type prefixes fast
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            title, author,
+            content='books', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def _create_report_summaries(conn):
+    # Summary tables behind ReportsPage, kept current by triggers on issues
+    # and transactions so reports never scan the history
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS loan_summary (
+            user_id INTEGER PRIMARY KEY,
+            active_loans INTEGER NOT NULL DEFAULT 0,
+            total_loans INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS book_circulation (
+            book_id INTEGER PRIMARY KEY,
+            times_issued INTEGER NOT NULL DEFAULT 0,
+            on_loan INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fine_summary (
+            user_id INTEGER PRIMARY KEY, -- 0 when the issue was unknown
+            outstanding REAL NOT NULL DEFAULT 0,
+            unpaid_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_loan_summary_active ON loan_summary(active_loans)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_book_circulation_issued ON book_circulation(times_issued)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fine_summary_outstanding ON fine_summary(outstanding)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_return_date ON issues(return_date)")
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS issues_summary_insert AFTER INSERT ON issues BEGIN
+            INSERT INTO loan_summary (user_id, active_loans, total_loans) VALUES (new.user_id, 1, 1)
+                ON CONFLICT(user_id) DO UPDATE SET active_loans = active_loans + 1, total_loans = total_loans + 1;
+            INSERT INTO book_circulation (book_id, times_issued, on_loan) VALUES (new.book_id, 1, 1)
+                ON CONFLICT(book_id) DO UPDATE SET times_issued = times_issued + 1, on_loan = on_loan + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS issues_summary_delete AFTER DELETE ON issues BEGIN
+            UPDATE loan_summary SET active_loans = active_loans - 1 WHERE user_id = old.user_id;
+            UPDATE book_circulation SET on_loan = on_loan - 1 WHERE book_id = old.book_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS issues_summary_update AFTER UPDATE OF book_id, user_id ON issues BEGIN
+            UPDATE loan_summary SET active_loans = active_loans - 1, total_loans = total_loans - 1
+                WHERE user_id = old.user_id;
+            UPDATE book_circulation SET on_loan = on_loan - 1, times_issued = times_issued - 1
+                WHERE book_id = old.book_id;
+            INSERT INTO loan_summary (user_id, active_loans, total_loans) VALUES (new.user_id, 1, 1)
+                ON CONFLICT(user_id) DO UPDATE SET active_loans = active_loans + 1, total_loans = total_loans + 1;
+            INSERT INTO book_circulation (book_id, times_issued, on_loan) VALUES (new.book_id, 1, 1)
+                ON CONFLICT(book_id) DO UPDATE SET times_issued = times_issued + 1, on_loan = on_loan + 1;
+        END
+    ''')
+
+    # Fines are attributed to the borrower when they are recorded, because
+    # the issue row is deleted once the book comes back
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+    if "user_id" not in columns:
+        conn.execute("ALTER TABLE transactions ADD COLUMN user_id INTEGER")
+    conn.execute('''
+        UPDATE transactions SET user_id = COALESCE((SELECT user_id FROM issues WHERE id = transactions.issue_id), 0)
+        WHERE user_id IS NULL
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_user AFTER INSERT ON transactions
+        WHEN new.user_id IS NULL BEGIN
+            UPDATE transactions SET user_id = COALESCE((SELECT user_id FROM issues WHERE id = new.issue_id), 0)
+            WHERE id = new.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_summary_insert AFTER INSERT ON transactions
+        WHEN new.paid = 0 BEGIN
+            INSERT INTO fine_summary (user_id, outstanding, unpaid_count)
+                VALUES (COALESCE(new.user_id, (SELECT user_id FROM issues WHERE id = new.issue_id), 0), new.fine, 1)
+                ON CONFLICT(user_id) DO UPDATE SET outstanding = outstanding + excluded.outstanding,
+                                                   unpaid_count = unpaid_count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_summary_delete AFTER DELETE ON transactions
+        WHEN old.paid = 0 BEGIN
+            UPDATE fine_summary SET outstanding = outstanding - old.fine, unpaid_count = unpaid_count - 1
+                WHERE user_id = COALESCE(old.user_id, 0);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_summary_update AFTER UPDATE OF fine, paid ON transactions BEGIN
+            UPDATE fine_summary SET outstanding = outstanding - old.fine, unpaid_count = unpaid_count - 1
+                WHERE old.paid = 0 AND user_id = COALESCE(old.user_id, 0);
+            INSERT INTO fine_summary (user_id, outstanding, unpaid_count)
+                SELECT COALESCE(new.user_id, 0), new.fine, 1 WHERE new.paid = 0
+                ON CONFLICT(user_id) DO UPDATE SET outstanding = outstanding + excluded.outstanding,
+                                                   unpaid_count = unpaid_count + 1;
+        END
+    ''')
+
+    # One-off backfill from the existing history
+    conn.execute('''
+        INSERT OR REPLACE INTO loan_summary (user_id, active_loans, total_loans)
+        SELECT user_id, COUNT(*), COUNT(*) FROM issues GROUP BY user_id
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO book_circulation (book_id, times_issued, on_loan)
+        SELECT book_id, COUNT(*), COUNT(*) FROM issues GROUP BY book_id
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO fine_summary (user_id, outstanding, unpaid_count)
+        SELECT user_id, SUM(fine), COUNT(*) FROM transactions WHERE paid = 0 GROUP BY user_id
+    ''')
+
+
+def _close_issues_on_return(conn):
+    # Returns now close an issue by setting returned_date instead of deleting
+    # it, so circulation history is kept. Only open issues count as loans.
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(issues)")]
+    if "returned_date" not in columns:
+        conn.execute("ALTER TABLE issues ADD COLUMN returned_date TEXT")
+    conn.execute("DROP INDEX IF EXISTS idx_issues_return_date")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_open_due ON issues(return_date) WHERE returned_date IS NULL")
+
+    conn.execute("DROP TRIGGER IF EXISTS issues_summary_delete")
+    conn.execute("DROP TRIGGER IF EXISTS issues_summary_update")
+    conn.execute('''
+        CREATE TRIGGER issues_summary_delete AFTER DELETE ON issues
+        WHEN old.returned_date IS NULL BEGIN
+            UPDATE loan_summary SET active_loans = active_loans - 1 WHERE user_id = old.user_id;
+            UPDATE book_circulation SET on_loan = on_loan - 1 WHERE book_id = old.book_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER issues_summary_close AFTER UPDATE OF returned_date ON issues
+        WHEN old.returned_date IS NULL AND new.returned_date IS NOT NULL BEGIN
+            UPDATE loan_summary SET active_loans = active_loans - 1 WHERE user_id = old.user_id;
+            UPDATE book_circulation SET on_loan = on_loan - 1 WHERE book_id = old.book_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER issues_summary_update AFTER UPDATE OF book_id, user_id ON issues BEGIN
+            UPDATE loan_summary SET active_loans = active_loans - (old.returned_date IS NULL),
+                                    total_loans = total_loans - 1
+                WHERE user_id = old.user_id;
+            UPDATE book_circulation SET on_loan = on_loan - (old.returned_date IS NULL),
+                                        times_issued = times_issued - 1
+                WHERE book_id = old.book_id;
+            INSERT INTO loan_summary (user_id, active_loans, total_loans)
+                VALUES (new.user_id, new.returned_date IS NULL, 1)
+                ON CONFLICT(user_id) DO UPDATE SET active_loans = active_loans + excluded.active_loans,
+                                                   total_loans = total_loans + 1;
+            INSERT INTO book_circulation (book_id, times_issued, on_loan)
+                VALUES (new.book_id, 1, new.returned_date IS NULL)
+                ON CONFLICT(book_id) DO UPDATE SET times_issued = times_issued + 1,
+                                                   on_loan = on_loan + excluded.on_loan;
+        END
+    ''')
+
+
+def _track_issue_changes(conn):
+    # Change tracking for the nightly fine job: every insert or due/return
+    # date change stamps the issue with the next value of a counter, so the
+    # job can pick up only rows changed since its last run
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(issues)")]
+    if "updated_seq" not in columns:
+        conn.execute("ALTER TABLE issues ADD COLUMN updated_seq INTEGER")
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+    if "accrued" not in columns:
+        conn.execute("ALTER TABLE transactions ADD COLUMN accrued BOOLEAN NOT NULL DEFAULT 0")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("UPDATE issues SET updated_seq = id WHERE updated_seq IS NULL")
+    conn.execute("INSERT OR IGNORE INTO change_counter (name, value) SELECT 'issues', COALESCE(MAX(id), 0) FROM issues")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_updated_seq ON issues(updated_seq)")
+    # At most one job-generated fine per issue, so accrual can upsert
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_accrued ON transactions(issue_id) WHERE accrued = 1")
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS issues_change_insert AFTER INSERT ON issues BEGIN
+            UPDATE change_counter SET value = value + 1 WHERE name = 'issues';
+            UPDATE issues SET updated_seq = (SELECT value FROM change_counter WHERE name = 'issues')
+                WHERE id = new.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS issues_change_update AFTER UPDATE OF return_date, returned_date ON issues BEGIN
+            UPDATE change_counter SET value = value + 1 WHERE name = 'issues';
+            UPDATE issues SET updated_seq = (SELECT value FROM change_counter WHERE name = 'issues')
+                WHERE id = new.id;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fine_accrual_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            watermark INTEGER NOT NULL DEFAULT 0, -- change_counter value fully processed
+            last_cutoff TEXT,                     -- cutoff of the last completed run
+            run_cutoff TEXT,                      -- the rest describes an unfinished run
+            run_high INTEGER,
+            phase TEXT,
+            cursor_seq INTEGER,
+            cursor_due TEXT,
+            cursor_id INTEGER
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO fine_accrual_state (id) VALUES (1)")
+
+
+def _track_paid_amounts(conn):
+    # A paid fine that keeps accruing must only bill the new days, so the
+    # amount paid is kept apart from the fine: a row is outstanding for
+    # fine - paid_amount until paid_amount covers the fine, and paid stays
+    # the "nothing owed" flag
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+    if "paid_amount" not in columns:
+        conn.execute("ALTER TABLE transactions ADD COLUMN paid_amount REAL NOT NULL DEFAULT 0")
+    conn.execute("UPDATE transactions SET paid_amount = fine WHERE paid = 1")
+    # Marking a fine paid the old way pays whatever was still owed
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_paid_in_full AFTER UPDATE OF paid ON transactions
+        WHEN new.paid = 1 AND new.paid_amount < new.fine BEGIN
+            UPDATE transactions SET paid_amount = fine WHERE id = new.id;
+        END
+    ''')
+
+    conn.execute("DROP TRIGGER IF EXISTS transactions_summary_insert")
+    conn.execute("DROP TRIGGER IF EXISTS transactions_summary_delete")
+    conn.execute("DROP TRIGGER IF EXISTS transactions_summary_update")
+    conn.execute('''
+        CREATE TRIGGER transactions_summary_insert AFTER INSERT ON transactions
+        WHEN new.paid = 0 BEGIN
+            INSERT INTO fine_summary (user_id, outstanding, unpaid_count)
+                VALUES (COALESCE(new.user_id, (SELECT user_id FROM issues WHERE id = new.issue_id), 0),
+                        new.fine - new.paid_amount, 1)
+                ON CONFLICT(user_id) DO UPDATE SET outstanding = outstanding + excluded.outstanding,
+                                                   unpaid_count = unpaid_count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER transactions_summary_delete AFTER DELETE ON transactions
+        WHEN old.paid = 0 BEGIN
+            UPDATE fine_summary SET outstanding = outstanding - (old.fine - old.paid_amount),
+                                    unpaid_count = unpaid_count - 1
+                WHERE user_id = COALESCE(old.user_id, 0);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER transactions_summary_update AFTER UPDATE OF fine, paid, paid_amount ON transactions BEGIN
+            UPDATE fine_summary SET outstanding = outstanding - (old.fine - old.paid_amount),
+                                    unpaid_count = unpaid_count - 1
+                WHERE old.paid = 0 AND user_id = COALESCE(old.user_id, 0);
+            INSERT INTO fine_summary (user_id, outstanding, unpaid_count)
+                SELECT COALESCE(new.user_id, 0), new.fine - new.paid_amount, 1 WHERE new.paid = 0
+                ON CONFLICT(user_id) DO UPDATE SET outstanding = outstanding + excluded.outstanding,
+                                                   unpaid_count = unpaid_count + 1;
+        END
+    ''')
+    conn.execute("DELETE FROM fine_summary")
+    conn.execute('''
+        INSERT INTO fine_summary (user_id, outstanding, unpaid_count)
+        SELECT user_id, SUM(fine - paid_amount), COUNT(*) FROM transactions WHERE paid = 0 GROUP BY user_id
+    ''')
+
+
+# (version, description, function) in the order they must be applied
+MIGRATIONS = [
+    (1, "create tables and seed data", _create_tables),
+    (2, "index issues.book_id, issues.user_id and users(username, password)", _create_indexes),
+    (3, "full-text index over books.title and books.author", _create_books_fts),
+    (4, "report summary tables maintained by triggers", _create_report_summaries),
+    (5, "close issues with returned_date instead of deleting them", _close_issues_on_return),
+    (6, "change tracking on issues and state for fine accrual", _track_issue_changes),
+    (7, "amount paid per fine, so a fine that grows after payment bills only the growth", _track_paid_amounts),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Function to upgrade the schema in place, returning the list of versions applied
+def migrate(conn, target=LATEST_VERSION):
+    version = schema_version(conn)
+    applied = []
+    for number, description, upgrade in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        conn.execute("BEGIN")
+        try:
+            upgrade(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+# Report queries for ReportsPage.
+#
+# Everything except the overdue list reads the summary tables maintained by
+# triggers (see LibraryMigrations), and the overdue list is a range scan on
+# the open-issues index on return_date, so each report is a bounded index
+# walk no matter how much history the library has.
+
+REPORT_LIMIT = 10
+
+
+def overdue_items(db, today=None, limit=REPORT_LIMIT):
+    """Oldest overdue loans as (book_id, title, user_id, return_date)."""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    return db.query_all('''
+        SELECT i.book_id, b.title, i.user_id, i.return_date
+        FROM issues i LEFT JOIN books b ON b.book_id = i.book_id
+        WHERE i.returned_date IS NULL AND i.return_date < ?
+        ORDER BY i.return_date LIMIT ?
+    ''', (today, limit))
+
+
+def outstanding_fines(db, limit=REPORT_LIMIT):
+    """Users with the largest unpaid fines as (user_id, username, outstanding, unpaid_count)."""
+    return db.query_all('''
+        SELECT f.user_id, u.username, f.outstanding, f.unpaid_count
+        FROM fine_summary f LEFT JOIN users u ON u.user_id = f.user_id
+        WHERE f.unpaid_count > 0
+        ORDER BY f.outstanding DESC LIMIT ?
+    ''', (limit,))
+
+
+def total_outstanding(db):
+    return db.query_one("SELECT COALESCE(SUM(outstanding), 0), COALESCE(SUM(unpaid_count), 0) FROM fine_summary")
+
+
+def loan_counts(db, limit=REPORT_LIMIT):
+    """Users with the most books out as (user_id, username, active_loans, total_loans)."""
+    return db.query_all('''
+        SELECT l.user_id, u.username, l.active_loans, l.total_loans
+        FROM loan_summary l LEFT JOIN users u ON u.user_id = l.user_id
+        ORDER BY l.active_loans DESC LIMIT ?
+    ''', (limit,))
+
+
+def circulation_by_book(db, limit=REPORT_LIMIT):
+    """Most issued books as (book_id, title, times_issued, on_loan)."""
+    return db.query_all('''
+        SELECT c.book_id, b.title, c.times_issued, c.on_loan
+        FROM book_circulation c LEFT JOIN books b ON b.book_id = c.book_id
+        ORDER BY c.times_issued DESC LIMIT ?
+    ''', (limit,))
+
+
+# Function to format every report as plain text lines for the UI
+def report_lines(db, today=None, limit=REPORT_LIMIT):
+    lines = ["Overdue items:"]
+    for book_id, title, user_id, return_date in overdue_items(db, today, limit):
+        lines.append(f"  {book_id} {title or '?'} - user {user_id}, due {return_date}")
+
+    total, count = total_outstanding(db)
+    lines.append(f"Outstanding fines: ${total:.2f} over {count} unpaid")
+    for user_id, username, outstanding, unpaid in outstanding_fines(db, limit):
+        lines.append(f"  {username or user_id}: ${outstanding:.2f} ({unpaid} unpaid)")
+
+    lines.append("Loans per user (active / total):")
+    for user_id, username, active, total_loans in loan_counts(db, limit):
+        lines.append(f"  {username or user_id}: {active} / {total_loans}")
+
+    lines.append("Circulation by book (issued / on loan):")
+    for book_id, title, issued, on_loan in circulation_by_book(db, limit):
+        lines.append(f"  {book_id} {title or '?'}: {issued} / {on_loan}")
+    return lines
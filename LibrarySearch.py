@@ -0,0 +1,87 @@
+import re
+
+# Full-text catalog search over the books_fts index (see LibraryMigrations).
+#
+# Every word the user types becomes a prefix term. Queries matching at most
+# RANK_LIMIT books are ranked: words matched whole first, then shorter
+# entries. Broader queries, such as a one- or two-letter prefix or a word in
+# most titles, are listed in catalog (rowid) order instead, paged with a
+# rowid keyset cursor, so no query reads or sorts more than RANK_LIMIT + 1
+# matches. If a ranked query grows past RANK_LIMIT matches between pages, its
+# order no longer exists, so the next page reports RESULTS_CHANGED instead of
+# silently starting over. FTS5's bm25 rank is not used: it counts every book
+# containing each term, which takes about as long as ranking the whole match
+# set.
+
+PAGE_SIZE = 20
+MIN_PREFIX = 2  # shorter words are not searched as you type (no prefix index covers one letter)
+RANK_LIMIT = 500
+RESULTS_CHANGED = "results_changed"  # cursor returned when a ranked listing can no longer be continued
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# Function to turn free text into an FTS5 query of quoted prefix terms
+def fts_query(text):
+    words = _WORD.findall(text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# Function to check that text has words and each is long enough to search as you type
+def searchable(text):
+    words = _WORD.findall(text)
+    return bool(words) and all(len(word) >= MIN_PREFIX for word in words)
+
+
+# Function to fetch up to limit matching books in rowid order, after a rowid
+def _matches(db, query, after_rowid, limit):
+    return db.query_all(
+        "SELECT b.id, b.book_id, b.title, b.author, b.available FROM books_fts "
+        "JOIN books b ON b.id = books_fts.rowid WHERE books_fts MATCH ? AND books_fts.rowid > ? "
+        "ORDER BY books_fts.rowid LIMIT ?", (query, after_rowid, limit))
+
+
+# Function to order a match: more query words matched whole, then shorter title and author
+def _rank_key(words, row):
+    rowid, _, title, author, _ = row
+    tokens = set(_WORD.findall(f"{title} {author}".lower()))
+    return -sum(word in tokens for word in words), len(title) + len(author), rowid
+
+
+def search_books(db, text, limit=PAGE_SIZE, after=None):
+    """Return (rows, cursor) for one page of results.
+
+    rows are (book_id, title, author, available) tuples. Pass the returned
+    cursor back as after to get the next page; it is None on the last page.
+    If the query matched more than RANK_LIMIT books since the previous ranked
+    page, no rows are returned and the cursor is RESULTS_CHANGED.
+    """
+    query = fts_query(text)
+    if not query:
+        return [], None
+    if after is None or after[0] == "rank":
+        matches = _matches(db, query, 0, RANK_LIMIT + 1)
+        if len(matches) <= RANK_LIMIT:
+            words = [word.lower() for word in _WORD.findall(text)]
+            ranked = sorted((_rank_key(words, row), row) for row in matches)
+            if after is not None:
+                ranked = [item for item in ranked if item[0] > after[1]]
+            page = ranked[:limit]
+            cursor = ("rank", page[-1][0]) if len(ranked) > limit else None
+            return [row[1:] for _, row in page], cursor
+        if after is not None:
+            return [], RESULTS_CHANGED
+        # Too broad to rank: list in catalog order
+        matches = matches[:limit + 1]
+    else:
+        matches = _matches(db, query, after[1], limit + 1)
+
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    cursor = ("rowid", matches[-1][0]) if has_more else None
+    return [row[1:] for row in matches], cursor
+
+
+# Function to index books inserted while the FTS triggers were disabled
+def index_new_books(conn, after_id):
+    conn.execute("INSERT INTO books_fts(rowid, title, author) "
+                 "SELECT id, title, author FROM books WHERE id > ?", (after_id,))
@@ -0,0 +1,59 @@
+from LibraryCirculation import NOT_FOUND, UNKNOWN_USER, issue_books, return_books
+from LibraryReports import report_lines
+from LibrarySearch import search_books
+
+# Headless service layer for the library.
+#
+# Every operation the pages offer is a plain function taking a Database, so
+# the same code runs on the UI's worker thread, in scripts and under the
+# load generator. Ids typed into the UI arrive as strings and are validated
+# here.
+
+
+# Function to parse an id from user input, returning None if it is not a number
+def parse_id(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def login(db, username, password):
+    """Return (id, role) for valid credentials, otherwise None."""
+    return db.query_one("SELECT id, role FROM users WHERE username=? AND password=?", (username, password))
+
+
+def add_book(db, title, author):
+    """Add an available book and return the book_id assigned to it."""
+    with db.transaction(immediate=True):
+        book_id = db.query_one("SELECT COALESCE(MAX(book_id), 0) + 1 FROM books")[0]
+        db.execute("INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)",
+                   (book_id, title, author, True))
+    return book_id
+
+
+def issue_book(db, book_id, user_id):
+    """Issue one book and return its status from LibraryCirculation."""
+    book_id = parse_id(book_id)
+    user_id = parse_id(user_id)
+    if book_id is None:
+        return NOT_FOUND
+    if user_id is None:
+        return UNKNOWN_USER
+    return issue_books(db, [(book_id, user_id)])[0][1]
+
+
+def return_book(db, book_id):
+    """Return one book and return its status from LibraryCirculation."""
+    book_id = parse_id(book_id)
+    if book_id is None:
+        return NOT_FOUND
+    return return_books(db, [book_id])[0][1]
+
+
+def search(db, text, after=None):
+    return search_books(db, text, after=after)
+
+
+def reports(db):
+    return report_lines(db)
@@ -0,0 +1,106 @@
+import queue
+import threading
+
+from LibraryDatabase import DB_PATH, Database
+
+# Background database worker for the library UI.
+#
+# One thread owns the database connection and runs jobs from a queue. A job is
+# any callable taking the Database; its result (or exception) is handed back
+# on the Tk thread by polling with after(), so callbacks can touch widgets.
+
+POLL_INTERVAL = 20  # milliseconds between result checks while jobs are pending
+
+
+class Job:
+    def __init__(self, func, on_success, on_error, key):
+        self.func = func
+        self.on_success = on_success
+        self.on_error = on_error
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DatabaseWorker:
+    def __init__(self, root, path=DB_PATH, on_busy=None):
+        """on_busy(pending) is called on the Tk thread whenever the number of
+        unfinished jobs changes, so the app can show a busy indicator."""
+        self.root = root
+        self.path = path
+        self.on_busy = on_busy
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}
+        self.pending = 0
+        self.polling = None
+        self.thread = threading.Thread(target=self._run, name="library-db", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        db = Database(self.path)
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                if job.cancelled:
+                    self.results.put((job, None, None))
+                    continue
+                try:
+                    self.results.put((job, job.func(db), None))
+                except Exception as exc:
+                    self.results.put((job, None, exc))
+        finally:
+            db.close()
+
+    def submit(self, func, on_success=None, on_error=None, key=None):
+        """Queue func(db) and return its Job.
+
+        Submitting a job with the same key as an unfinished one cancels the
+        older job, so only the latest search or refresh is delivered.
+        """
+        if key is not None and key in self.latest:
+            self.latest[key].cancel()
+        job = Job(func, on_success, on_error, key)
+        if key is not None:
+            self.latest[key] = job
+        self.pending += 1
+        self.jobs.put(job)
+        self._busy_changed()
+        if self.polling is None:
+            self.polling = self.root.after(POLL_INTERVAL, self._poll)
+        return job
+
+    def _poll(self):
+        self.polling = None
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if job.key is not None and self.latest.get(job.key) is job:
+                del self.latest[job.key]
+            if job.cancelled:
+                continue
+            if error is not None:
+                if job.on_error is not None:
+                    job.on_error(error)
+                else:
+                    self.root.report_callback_exception(type(error), error, error.__traceback__)
+            elif job.on_success is not None:
+                job.on_success(result)
+        self._busy_changed()
+        if self.pending:
+            self.polling = self.root.after(POLL_INTERVAL, self._poll)
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            self.on_busy(self.pending)
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
@@ -1,20 +1,42 @@
+import argparse
 import random
 
+from QuizBank import BANK_PATH, QuestionBank
+
 class QuizGame:
-    def __init__(self):
+    # With a QuestionBank, questions are sampled by id and each one is read
+    # from the bank only when it is displayed
+    def __init__(self, bank=None, category=None, difficulty=None, num_questions=10):
         self.questions = []
         self.answers = []
         self.options = []
         self.score = 0
+        self.bank = bank
+        self.category = category
+        self.difficulty = difficulty
+        self.num_questions = num_questions
+        self.asked = 0
+        self.current = None  # (id, question, answer, options) of the question on screen
 
     def add_question(self, question, answer, options):
+        if self.bank is not None:
+            self.bank.add_question(question, answer, options)
+            return
         self.questions.append(question)
         self.answers.append(answer)
         self.options.append(options)
 
+    # Function to fetch a question by index (or bank id): (question, answer, options)
+    def load_question(self, index):
+        if self.bank is None:
+            return self.questions[index], self.answers[index], self.options[index]
+        if self.current is None or self.current[0] != index:
+            self.current = (index, *self.bank.get(index))
+        return self.current[1:]
+
     def display_question(self, index):
-        print(self.questions[index])
-        options = self.options[index]
+        question, _, options = self.load_question(index)
+        print(question)
         for i, option in enumerate(options, 1):
             print(f"{i}. {option}")
 
@@ -22,7 +44,7 @@ class QuizGame:
         return input("Your answer: ")
 
     def check_answer(self, user_answer, index):
-        correct_answer = self.answers[index]
+        correct_answer = self.load_question(index)[1]
         if user_answer.lower() == correct_answer.lower():
             print("Correct!")
             self.score += 1
@@ -30,9 +52,15 @@ class QuizGame:
             print("Incorrect. The correct answer is:", correct_answer)
 
     def run_quiz(self):
-        num_questions = len(self.questions)
-        order = list(range(num_questions))
-        random.shuffle(order)
+        if self.bank is not None:
+            order = self.bank.sample(self.num_questions, self.category, self.difficulty)
+        else:
+            order = list(range(len(self.questions)))
+            random.shuffle(order)
+        num_questions = self.asked = len(order)
+        if not num_questions:
+            print("No questions to ask.")
+            return
 
         print("Welcome to the Quiz Game!\n")
         print("You will be asked", num_questions, "questions.\n")
@@ -48,7 +76,7 @@ class QuizGame:
         self.show_feedback()
 
     def show_feedback(self):
-        percent_correct = (self.score / len(self.questions)) * 100
+        percent_correct = (self.score / self.asked) * 100
         if percent_correct == 100:
             print("Congratulations! You got all questions correct.")
         elif percent_correct >= 75:
@@ -59,14 +87,26 @@ class QuizGame:
             print("Keep practicing! You can improve.")
 
 if __name__ == "__main__":
-    quiz = QuizGame()
+    parser = argparse.ArgumentParser(description="Play the quiz game.")
+    parser.add_argument("--bank", nargs="?", const=BANK_PATH, help="ask questions from a question bank database")
+    parser.add_argument("--category", help="only ask questions from this category")
+    parser.add_argument("--difficulty", help="only ask questions of this difficulty")
+    parser.add_argument("--count", type=int, default=10, help="number of questions to ask from the bank")
+    args = parser.parse_args()
+
+    if args.bank:
+        bank = QuestionBank(args.bank)
+        QuizGame(bank, args.category, args.difficulty, args.count).run_quiz()
+        bank.close()
+    else:
+        quiz = QuizGame()
 
-    # Add questions, answers, and options
-    quiz.add_question("What is the capital of France?", "Paris", ["Paris", "London", "Berlin", "Madrid"])
-    quiz.add_question("What is 2 * 2?", "4", ["2", "3", "4", "5"])
-    quiz.add_question("Who wrote 'Romeo and Juliet'?", "William Shakespeare", ["Charles Dickens", "Mark Twain", "Jane Austen", "William Shakespeare"])
-    quiz.add_question("What is the largest planet in our solar system?", "Jupiter", ["Mars", "Saturn", "Jupiter", "Venus"])
-    # Add more questions...
+        # Add questions, answers, and options
+        quiz.add_question("What is the capital of France?", "Paris", ["Paris", "London", "Berlin", "Madrid"])
+        quiz.add_question("What is 2 * 2?", "4", ["2", "3", "4", "5"])
+        quiz.add_question("Who wrote 'Romeo and Juliet'?", "William Shakespeare", ["Charles Dickens", "Mark Twain", "Jane Austen", "William Shakespeare"])
+        quiz.add_question("What is the largest planet in our solar system?", "Jupiter", ["Mars", "Saturn", "Jupiter", "Venus"])
+        # Add more questions...
     
-    # Run the quiz
-    quiz.run_quiz()
+        # Run the quiz
+        quiz.run_quiz()
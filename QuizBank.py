@@ -0,0 +1,253 @@
+import argparse
+import bisect
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+# SQLite question bank for QuizGame.
+#
+# Questions live in one table indexed by (category, difficulty, pos), where
+# pos numbers the questions of each category/difficulty bucket 0..size-1
+# without gaps; the buckets table holds each bucket's size. A random sample
+# of N questions is drawn by picking N positions (weighted across buckets by
+# their sizes) and fetching exactly those rows by index, so nothing is
+# loaded or shuffled in proportion to the bank. Sampling returns ids only;
+# question text is read when a question is shown.
+
+BANK_PATH = "quiz.db"
+DEFAULT_DIFFICULTY = "medium"
+MAX_PARAMS = 500  # ids per IN (...) lookup, well under SQLite's parameter limit
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+)
+
+
+def connect(path=BANK_PATH):
+    conn = sqlite3.connect(path, isolation_level=None)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            category TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            pos INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            options TEXT NOT NULL  -- JSON list
+        )
+    ''')
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_bucket ON questions(category, difficulty, pos)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS buckets (
+            category TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (category, difficulty)
+        )
+    ''')
+    return conn
+
+
+class QuestionBank:
+    def __init__(self, path=BANK_PATH):
+        self.path = path
+        self.conn = connect(path)
+
+    def add_questions(self, rows):
+        """Add (question, answer, options, category, difficulty) rows; return how many were added."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            sizes = {(category, difficulty): size for category, difficulty, size
+                     in self.conn.execute("SELECT category, difficulty, size FROM buckets")}
+            count = 0
+
+            def numbered():
+                nonlocal count
+                for question, answer, options, category, difficulty in rows:
+                    difficulty = difficulty or DEFAULT_DIFFICULTY
+                    pos = sizes.get((category, difficulty), 0)
+                    sizes[category, difficulty] = pos + 1
+                    count += 1
+                    yield category, difficulty, pos, question, answer, json.dumps(list(options))
+
+            self.conn.executemany("INSERT INTO questions (category, difficulty, pos, question, answer, options) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)", numbered())
+            self.conn.executemany("INSERT OR REPLACE INTO buckets (category, difficulty, size) VALUES (?, ?, ?)",
+                                  ((category, difficulty, size) for (category, difficulty), size in sizes.items()))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def add_question(self, question, answer, options, category="General", difficulty=DEFAULT_DIFFICULTY):
+        self.add_questions([(question, answer, options, category, difficulty)])
+
+    def remove_question(self, question_id):
+        """Delete a question, moving the last one of its bucket into its position."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT category, difficulty, pos FROM questions WHERE id = ?",
+                                    (question_id,)).fetchone()
+            if row is not None:
+                category, difficulty, pos = row
+                size = self.conn.execute("SELECT size FROM buckets WHERE category = ? AND difficulty = ?",
+                                         (category, difficulty)).fetchone()[0]
+                self.conn.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+                self.conn.execute("UPDATE questions SET pos = ? WHERE category = ? AND difficulty = ? AND pos = ?",
+                                  (pos, category, difficulty, size - 1))
+                self.conn.execute("UPDATE buckets SET size = size - 1 WHERE category = ? AND difficulty = ?",
+                                  (category, difficulty))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def buckets(self, category=None, difficulty=None):
+        """Return [(category, difficulty, size)] matching the filters."""
+        sql = "SELECT category, difficulty, size FROM buckets WHERE size > 0"
+        params = []
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        if difficulty is not None:
+            sql += " AND difficulty = ?"
+            params.append(difficulty)
+        return self.conn.execute(sql + " ORDER BY category, difficulty", params).fetchall()
+
+    def count(self, category=None, difficulty=None):
+        return sum(size for _, _, size in self.buckets(category, difficulty))
+
+    def sample(self, n, category=None, difficulty=None, rng=random):
+        """Return the ids of n random distinct questions, in random order.
+
+        Costs O(n) plus one lookup per bucket, whatever the size of the bank.
+        """
+        buckets = self.buckets(category, difficulty)
+        offsets = []
+        total = 0
+        for _, _, size in buckets:
+            offsets.append(total)
+            total += size
+        picks = {}
+        for position in rng.sample(range(total), min(n, total)):
+            index = bisect.bisect_right(offsets, position) - 1
+            picks.setdefault(index, []).append(position - offsets[index])
+        ids = []
+        for index, positions in picks.items():
+            category_name, difficulty_name = buckets[index][:2]
+            for start in range(0, len(positions), MAX_PARAMS):
+                chunk = positions[start:start + MAX_PARAMS]
+                ids.extend(row[0] for row in self.conn.execute(
+                    f"SELECT id FROM questions WHERE category = ? AND difficulty = ? "
+                    f"AND pos IN ({', '.join('?' * len(chunk))})", [category_name, difficulty_name, *chunk]))
+        rng.shuffle(ids)
+        return ids
+
+    def get(self, question_id):
+        """Return (question, answer, options) for one question."""
+        question, answer, options = self.conn.execute(
+            "SELECT question, answer, options FROM questions WHERE id = ?", (question_id,)).fetchone()
+        return question, answer, json.loads(options)
+
+    def close(self):
+        self.conn.close()
+
+
+# Function to read questions from a JSON Lines file (question, answer, options, category, difficulty keys)
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                item = json.loads(line)
+                yield (item["question"], item["answer"], item["options"],
+                       item.get("category", "General"), item.get("difficulty", DEFAULT_DIFFICULTY))
+
+
+# Function to generate synthetic questions for benchmarking
+def sample_questions(count, categories=20, seed=1):
+    rng = random.Random(seed)
+    difficulties = ("easy", "medium", "hard")
+    for i in range(count):
+        answer = str(rng.randint(0, 10 ** 6))
+        options = [answer] + [str(rng.randint(0, 10 ** 6)) for _ in range(3)]
+        rng.shuffle(options)
+        yield (f"Sample question {i}: what number is the answer? " + "x" * rng.randint(20, 200),
+               answer, options, f"Category {i % categories}", difficulties[i % 3])
+
+
+# Function to compare sampling from the bank with loading and shuffling every question
+def benchmark(count=300000, n=10):
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = QuestionBank(os.path.join(tmp, "bank.db"))
+        start = time.perf_counter()
+        bank.add_questions(sample_questions(count))
+        print(f"Built a bank of {count} questions in {time.perf_counter() - start:.2f}s")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        questions, answers, options = [], [], []
+        for question, answer, choices in bank.conn.execute("SELECT question, answer, options FROM questions"):
+            questions.append(question)
+            answers.append(answer)
+            options.append(json.loads(choices))
+        order = list(range(len(questions)))
+        random.shuffle(order)
+        [questions[i] for i in order[:n]]
+        lists_seconds = time.perf_counter() - start
+        lists_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del questions, answers, options, order
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        ids = bank.sample(n, "Category 3", "hard")
+        for question_id in ids:
+            bank.get(question_id)
+        bank_seconds = time.perf_counter() - start
+        bank_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        bank.sample(n)
+        any_seconds = time.perf_counter() - start
+        bank.close()
+    print(f"{n} questions by loading parallel lists and shuffling: {lists_seconds * 1000:9.1f} ms, "
+          f"peak {lists_peak / 2 ** 20:7.1f} MiB")
+    print(f"{n} questions sampled from one bucket and loaded:     {bank_seconds * 1000:9.1f} ms, "
+          f"peak {bank_peak / 2 ** 20:7.1f} MiB")
+    print(f"{n} question ids sampled across all buckets:        {any_seconds * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the quiz question bank.")
+    parser.add_argument("--bank", default=BANK_PATH, help="question bank database")
+    parser.add_argument("--import", dest="import_path", metavar="JSONL", help="add questions from a JSON Lines file")
+    parser.add_argument("--stats", action="store_true", help="list categories and difficulties with their sizes")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time sampling from a synthetic bank of N questions")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    bank = QuestionBank(args.bank)
+    if args.import_path:
+        start = time.perf_counter()
+        count = bank.add_questions(read_jsonl(args.import_path))
+        print(f"Imported {count} questions in {time.perf_counter() - start:.2f}s")
+    if args.stats or not args.import_path:
+        for category, difficulty, size in bank.buckets():
+            print(f"{size:>9} {category} ({difficulty})")
+        print(f"{bank.count():>9} total")
+    bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import codecs
+import io
+import random
+import time
+
+import numpy as np
+
+from Word_Counter import CHUNK_SIZE, count_words
+
+# Byte-level word counting kernel.
+#
+# Instead of building a list of words, the input bytes are viewed as a NumPy
+# uint8 array, classified as whitespace or not, and the word starts (a
+# non-whitespace byte after whitespace, or at the start) are counted. Nothing
+# is allocated per word.
+#
+# The table knows only ASCII whitespace: space, \t \n \v \f \r and the
+# separators \x1c-\x1f, the same bytes str.split() treats as whitespace. In
+# UTF-8 every byte of a multi-byte character is >= 0x80, so such characters
+# count as word bytes, which is right for all of them except the Unicode
+# spaces (U+0085, U+00A0, U+1680, U+2000-U+200A, U+2028, U+2029, U+202F,
+# U+205F, U+3000). Their encodings all begin with 0xC2, 0xE1, 0xE2 or 0xE3,
+# so a chunk containing any of those bytes is decoded and counted with
+# count_words instead.
+
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[list(b" \t\n\v\f\r\x1c\x1d\x1e\x1f")] = True
+
+
+# Function to tell whether a byte array may contain non-ASCII whitespace
+def needs_decoding(array):
+    if not len(array) or array.max() < 0xC2:
+        return False
+    # 0xC2, or 0xE1-0xE3 (uint8 subtraction wraps, so one compare tests the range)
+    return bool(((array == 0xC2) | (array - np.uint8(0xE1) < 3)).any())
+
+
+# Function to mark the whitespace bytes of a byte array
+def is_space(array):
+    # Every byte up to 0x20 is whitespace except the controls 0x00-0x08 and
+    # 0x0e-0x1b; one comparison is much faster than a table lookup, so the
+    # table is only used when such controls are present
+    if ((array < 9) | (array - np.uint8(14) < 14)).any():
+        return _SPACE.take(array)
+    return array <= 32
+
+
+# Function to count word starts in a byte array; returns (count, ends inside a word)
+def count_word_starts(array, in_word=False):
+    if not len(array):
+        return 0, in_word
+    space = is_space(array)
+    # A word starts where a non-space byte follows a space byte
+    count = int(np.count_nonzero(space[:-1] > space[1:]))
+    if not space[0] and not in_word:
+        count += 1
+    return count, not space[-1]
+
+
+def count_words_bytes(data):
+    """Count the words in UTF-8 bytes; the same as len(data.decode("utf-8", "replace").split())."""
+    array = np.frombuffer(data, dtype=np.uint8)
+    if needs_decoding(array):
+        return count_words(bytes(data).decode("utf-8", "replace"))
+    return count_word_starts(array)[0]
+
+
+def count_words_stream(stream, chunk_size=CHUNK_SIZE):
+    """Count the words in a UTF-8 binary stream, chunk by chunk.
+
+    Chunks that may hold Unicode whitespace, or that continue a character the
+    decoder is still waiting on, go through an incremental decoder and
+    str.split(); all others use the byte kernel.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    total = 0
+    in_word = False
+    while True:
+        data = stream.read(chunk_size)
+        array = np.frombuffer(data, dtype=np.uint8)
+        if data and not decoder.getstate()[0] and not needs_decoding(array):
+            count, in_word = count_word_starts(array, in_word)
+            total += count
+        else:
+            text = decoder.decode(data, final=not data)
+            if text:
+                total += count_words(text)
+                if in_word and not text[0].isspace():
+                    total -= 1
+                in_word = not text[-1].isspace()
+        if not data:
+            return total
+
+
+# Function to check the kernel against str.split() on random text; raises
+# AssertionError on the first mismatch (explicitly, so it also runs under -O)
+def self_test(trials=2000, seed=1):
+    rng = random.Random(seed)
+    spaces = [" ", "\t", "\n", "\v", "\f", "\r", "\x1c", "\x1d", "\x1e", "\x1f", "\x85", "\xa0", "\u1680",
+              "\u2000", "\u200a", "\u2028", "\u2029", "\u202f", "\u205f", "\u3000"]
+    letters = ["a", "Z", "0", "\xe9", "\xdf", "\xc2", "\u65e5", "\u672c", "\u200b", "\u2030", "\U0001f600",
+               "\x00", "\x08", "\x0e", "\x1b", "\x7f"]
+    for _ in range(trials):
+        text = "".join(rng.choice(spaces if rng.random() < 0.3 else letters) for _ in range(rng.randint(0, 60)))
+        data = text.encode("utf-8")
+        if rng.random() < 0.1:
+            data = data[:rng.randint(0, len(data))] + b"\xff" + data[rng.randint(0, len(data)):]
+        expected = len(data.decode("utf-8", "replace").split())
+        counted = count_words_bytes(data)
+        if counted != expected:
+            raise AssertionError(f"count_words_bytes({data!r}) = {counted}, str.split() gives {expected}")
+        for chunk_size in (1, 2, 3, 5, 64):
+            counted = count_words_stream(io.BytesIO(data), chunk_size)
+            if counted != expected:
+                raise AssertionError(f"count_words_stream({data!r}, chunk_size={chunk_size}) = {counted}, "
+                                     f"str.split() gives {expected}")
+    print(f"Self-test passed: {trials} random texts match str.split()")
+
+
+# Function to time str.split() against the kernel on ASCII and mixed text
+def benchmark(megabytes=64):
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    ascii_text = " ".join(rng.choices(vocabulary, k=megabytes * 2 ** 20 // 9)).encode()
+    samples = {"ASCII": ascii_text,
+               "non-ASCII letters": ascii_text.replace(b"word1", "w\xf6rd".encode()),
+               "Unicode spaces": ascii_text.replace(b"word1 ", "word1\u3000".encode())}
+    for label, data in samples.items():
+        start = time.perf_counter()
+        expected = len(data.decode("utf-8").split())
+        split_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        counted = count_words_stream(io.BytesIO(data))
+        kernel_seconds = time.perf_counter() - start
+        if counted != expected:
+            raise AssertionError(f"{label}: kernel counted {counted} words, str.split() {expected}")
+        size = len(data) / 2 ** 20
+        print(f"{label:<18} {size:6.1f} MB: str.split {size / split_seconds:7.1f} MB/s, "
+              f"kernel {size / kernel_seconds:7.1f} MB/s ({split_seconds / kernel_seconds:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Byte-level word counting kernel.")
+    parser.add_argument("paths", nargs="*", help="UTF-8 files to count")
+    parser.add_argument("--test", action="store_true", help="check the kernel against str.split()")
+    parser.add_argument("--benchmark", type=int, metavar="MB", help="time the kernel on MB megabytes of text")
+    args = parser.parse_args()
+
+    if args.test:
+        self_test()
+    if args.benchmark:
+        benchmark(args.benchmark)
+    for path in args.paths:
+        with open(path, "rb") as file:
+            print(f"{count_words_stream(file):>12} {path}")
+    if not (args.test or args.benchmark or args.paths):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Word_Counter import CHUNK_SIZE, iter_words
+from WordCounterKernel import count_words_stream
+
+# Parallel word counting over many files with a process pool.
+#
+# Map: every file, or every split of a large file, is one task naming a path
+# and a byte range. The worker opens the file itself and streams its range
+# through the byte kernel's count_words_stream (or iter_words for
+# frequencies), so no text passes through the parent. Splits end just after
+# an ASCII whitespace byte: no word can straddle two splits, and since such a
+# byte is never part of a multi-byte UTF-8 character, every split starts on a
+# character boundary. Reduce: word counts are summed and frequency Counters
+# merged as tasks finish.
+#
+# Splitting relies on an ASCII-compatible encoding such as UTF-8.
+
+SPLIT_SIZE = 64 * 2 ** 20
+SCAN_SIZE = 64 * 1024
+# Bytes that str.split() treats as whitespace on their own
+ASCII_WHITESPACE = frozenset(b" \t\n\v\f\r\x1c\x1d\x1e\x1f")
+
+
+# Function to list the files under the given files and directories
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+    return files
+
+
+# Function to return the offset just past the first whitespace byte at or after offset
+def whitespace_boundary(file, offset, size):
+    file.seek(offset)
+    while offset < size:
+        block = file.read(SCAN_SIZE)
+        for index, byte in enumerate(block):
+            if byte in ASCII_WHITESPACE:
+                return offset + index + 1
+        offset += len(block)
+    return size
+
+
+# Function to split a file into (path, start, end) tasks of about split_size bytes
+def split_file(path, split_size=SPLIT_SIZE):
+    size = os.path.getsize(path)
+    tasks = []
+    start = 0
+    with open(path, "rb") as file:
+        while start < size:
+            end = size if size - start <= split_size else whitespace_boundary(file, start + split_size, size)
+            tasks.append((path, start, end))
+            start = end
+    return tasks or [(path, 0, 0)]
+
+
+class RangeReader:
+    """Read-only view of bytes start..end of a file, for the stream counters."""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.remaining = end - start
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+# Function run in a worker: count one range, returning (bytes, words, Counter or None)
+def count_range(path, start, end, frequencies=False, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as file:
+        reader = RangeReader(file, start, end)
+        if frequencies:
+            counts = Counter(iter_words(reader, chunk_size))
+            return end - start, sum(counts.values()), counts
+        return end - start, count_words_stream(reader, chunk_size), None
+
+
+def count_paths(paths, workers=None, frequencies=False, split_size=SPLIT_SIZE):
+    """Count the words in files and directories with a pool of workers.
+
+    Returns (total bytes, total words, Counter of words or None, seconds).
+    """
+    tasks = [task for path in collect_files(paths) for task in split_file(path, split_size)]
+    # Largest first, so a big split is not left running alone at the end
+    tasks.sort(key=lambda task: task[2] - task[1], reverse=True)
+    total_bytes = total_words = 0
+    counts = Counter() if frequencies else None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(count_range, path, begin, end, frequencies) for path, begin, end in tasks]
+        for job in as_completed(jobs):
+            size, words, partial = job.result()
+            total_bytes += size
+            total_words += words
+            if partial is not None:
+                counts.update(partial)
+    return total_bytes, total_words, counts, time.perf_counter() - start
+
+
+# Function to write synthetic text files for benchmarking
+def write_sample_corpus(directory, files=8, size=16 * 2 ** 20, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(20000)] + ["naïve", "日本語", "café"]
+    for index in range(files):
+        with open(os.path.join(directory, f"part{index}.txt"), "w", encoding="utf-8") as file:
+            written = 0
+            while written < size:
+                line = " ".join(rng.choices(vocabulary, k=12)) + "\n"
+                file.write(line)
+                written += len(line.encode("utf-8"))
+
+
+def print_scaling(paths, max_workers, frequencies, split_size):
+    """Run with 1, 2, 4, ... workers and report throughput and efficiency per core."""
+    counts = []
+    workers = 1
+    while True:
+        counts.append(min(workers, max_workers))
+        if workers >= max_workers:
+            break
+        workers *= 2
+    baseline = None
+    for workers in counts:
+        total_bytes, total_words, _, seconds = count_paths(paths, workers, frequencies, split_size)
+        baseline = baseline or seconds
+        speedup = baseline / seconds
+        print(f"{workers:>3} worker(s): {total_words} words, {total_bytes / 2 ** 20 / seconds:8.1f} MB/s, "
+              f"speedup {speedup:5.2f}x, efficiency {speedup / workers:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count words across many files with a process pool.")
+    parser.add_argument("paths", nargs="*", help="files and directories to count")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--split-size", type=int, default=SPLIT_SIZE, help="bytes per task for large files")
+    parser.add_argument("--top", type=int, metavar="N", help="also count word frequencies and list the N most common")
+    parser.add_argument("--scaling", action="store_true", help="compare 1, 2, 4, ... workers up to --workers")
+    parser.add_argument("--benchmark", type=int, metavar="MB", help="count a synthetic corpus of about MB megabytes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.paths
+        if args.benchmark:
+            write_sample_corpus(tmp, files=8, size=args.benchmark * 2 ** 20 // 8)
+            paths = [tmp]
+        elif not paths:
+            parser.error("give files or directories to count, or --benchmark")
+
+        if args.scaling or args.benchmark:
+            print_scaling(paths, args.workers, bool(args.top), args.split_size)
+            return
+        total_bytes, total_words, counts, seconds = count_paths(paths, args.workers, bool(args.top), args.split_size)
+
+    print(f"Word count: {total_words}")
+    rate = total_bytes / 2 ** 20 / seconds if seconds else 0.0
+    print(f"{total_bytes / 2 ** 20:.1f} MB in {seconds:.2f}s ({rate:.1f} MB/s, "
+          f"{rate / args.workers:.1f} MB/s per worker)")
+    if counts is not None:
+        for word, count in counts.most_common(args.top):
+            print(f"{count:>12} {word}")
+
+
+if __name__ == "__main__":
+    main()
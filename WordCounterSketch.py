@@ -0,0 +1,248 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from hashlib import blake2b
+from itertools import islice
+
+import numpy as np
+
+from Word_Counter import iter_words
+from WordCounterParallel import RangeReader, collect_files, count_paths, split_file
+
+# Top-K word frequencies in bounded memory.
+#
+# The exact path is a Counter of every word (via WordCounterParallel), which
+# needs memory for the whole vocabulary. The sketch path keeps a Count-Min
+# sketch: depth rows of width counters. Each word increments one counter per
+# row and its estimated count is the smallest of them, never below the true
+# count and, with probability 1 - delta, at most epsilon * total words above
+# it for width = e / epsilon and depth = ln(1 / delta). Beside it a candidate
+# set of about top_k words with the highest estimates is kept, so the top-K
+# list can be read back without storing the vocabulary.
+#
+# Words are hashed with blake2b (not hash(), which differs between
+# processes), so sketches built by parallel workers with the same shape and
+# seed merge by adding their tables.
+
+DEFAULT_EPSILON = 0.0001
+DEFAULT_DELTA = 0.001
+DEFAULT_TOP = 20
+EXACT_LIMIT = 64 * 2 ** 20  # inputs smaller than this use the exact Counter in auto mode
+BATCH_WORDS = 50000
+CHUNK_SIZE = 256 * 1024  # smaller reads than Word_Counter's, to keep the word batches small
+
+
+class CountMinSketch:
+    def __init__(self, width, depth, seed=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._key = seed.to_bytes(8, "little")
+        self._rows = np.arange(depth, dtype=np.uint64)[:, None]
+
+    @classmethod
+    def from_error(cls, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, seed=0):
+        """Size a sketch so estimates exceed true counts by at most epsilon * total
+        words, with probability 1 - delta."""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def _columns(self, words):
+        digests = b"".join(blake2b(word.encode("utf-8", "surrogatepass"), digest_size=8, key=self._key).digest()
+                           for word in words)
+        hashes = np.frombuffer(digests, dtype=np.uint64)
+        # Double hashing: row i uses h1 + i * h2
+        first = hashes & np.uint64(0xFFFFFFFF)
+        step = (hashes >> np.uint64(32)) | np.uint64(1)
+        return ((first + self._rows * step) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, counts):
+        """Add a {word: count} mapping; return (words, their new estimates)."""
+        words = list(counts)
+        if not words:
+            return words, np.empty(0, dtype=np.int64)
+        columns = self._columns(words)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(words))
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], values)
+        self.total += int(values.sum())
+        return words, self._estimate(columns)
+
+    def _estimate(self, columns):
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def estimates(self, words):
+        words = list(words)
+        if not words:
+            return np.empty(0, dtype=np.int64)
+        return self._estimate(self._columns(words))
+
+    def estimate(self, word):
+        return int(self.estimates([word])[0])
+
+    def merge(self, other):
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("only sketches with the same width, depth and seed can be merged")
+        self.table += other.table
+        self.total += other.total
+
+
+class HeavyHitters:
+    """Count-Min sketch plus the candidate words most likely to be in the top k."""
+
+    def __init__(self, top_k=DEFAULT_TOP, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, seed=0, sketch=None):
+        self.top_k = top_k
+        self.sketch = sketch or CountMinSketch.from_error(epsilon, delta, seed)
+        self.candidates = set()
+        self.threshold = 0
+
+    def update(self, counts):
+        words, estimates = self.sketch.add(counts)
+        for index in np.flatnonzero(estimates >= self.threshold):
+            self.candidates.add(words[index])
+        if len(self.candidates) > 2 * self.top_k:
+            self._prune()
+
+    def _prune(self):
+        ranked = self.top()
+        self.candidates = {word for word, _ in ranked}
+        if len(ranked) >= self.top_k:
+            self.threshold = ranked[-1][1]
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.candidates |= other.candidates
+        self._prune()
+
+    def top(self, n=None):
+        """Return [(word, estimated count)] for the n (default top_k) most frequent words."""
+        words = list(self.candidates)
+        estimates = self.sketch.estimates(words)
+        ranked = sorted(zip(words, estimates.tolist()), key=lambda item: (-item[1], item[0]))
+        return ranked[:n or self.top_k]
+
+    @property
+    def nbytes(self):
+        return self.sketch.nbytes
+
+
+# Function to feed the words of a binary stream into a HeavyHitters in batches
+def sketch_stream(stream, hitters, batch_words=BATCH_WORDS):
+    words = iter_words(stream, CHUNK_SIZE)
+    while True:
+        batch = Counter(islice(words, batch_words))
+        if not batch:
+            return hitters
+        hitters.update(batch)
+
+
+# Function run in a worker: sketch one byte range of a file
+def sketch_range(path, start, end, top_k, width, depth, seed):
+    hitters = HeavyHitters(top_k, sketch=CountMinSketch(width, depth, seed))
+    with open(path, "rb") as file:
+        return sketch_stream(RangeReader(file, start, end), hitters)
+
+
+def sketch_paths(paths, top_k=DEFAULT_TOP, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, workers=None, seed=0):
+    """Build one merged HeavyHitters over files and directories with a pool of workers."""
+    hitters = HeavyHitters(top_k, epsilon, delta, seed)
+    shape = (hitters.sketch.width, hitters.sketch.depth, seed)
+    tasks = [task for path in collect_files(paths) for task in split_file(path)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(sketch_range, path, start, end, top_k, *shape) for path, start, end in tasks]
+        for job in as_completed(jobs):
+            hitters.merge(job.result())
+    return hitters
+
+
+def top_words(paths, top_k=DEFAULT_TOP, mode="auto", epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, workers=None):
+    """Return (mode used, [(word, count)]) for the top_k words; counts are estimates in sketch mode."""
+    if mode == "auto":
+        size = sum(os.path.getsize(path) for path in collect_files(paths))
+        mode = "exact" if size < EXACT_LIMIT else "sketch"
+    if mode == "exact":
+        counts = count_paths(paths, workers, frequencies=True)[2]
+        return mode, counts.most_common(top_k)
+    return mode, sketch_paths(paths, top_k, epsilon, delta, workers).top()
+
+
+# Function to write a corpus whose word frequencies follow Zipf's law
+def write_zipf_corpus(path, words=5000000, vocabulary=2000000, exponent=1.1, seed=1):
+    rng = np.random.default_rng(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        for start in range(0, words, 1000000):
+            ranks = rng.zipf(exponent, min(1000000, words - start))
+            ranks = ranks[ranks <= vocabulary]
+            file.write(" ".join(f"w{rank}" for rank in ranks.tolist()) + "\n")
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+# Function to compare the exact and sketch paths for accuracy, memory and time
+def benchmark(words=5000000, top_k=DEFAULT_TOP, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "zipf.txt")
+        write_zipf_corpus(path, words)
+        with open(path, "rb") as file:
+            exact, exact_seconds, exact_peak = _measure(lambda: Counter(iter_words(file)))
+        with open(path, "rb") as file:
+            hitters, sketch_seconds, sketch_peak = _measure(
+                lambda: sketch_stream(file, HeavyHitters(top_k, epsilon, delta)))
+    total = sum(exact.values())
+    truth = exact.most_common(top_k)
+    found = hitters.top()
+    recall = len({word for word, _ in truth} & {word for word, _ in found}) / len(truth)
+    errors = [(hitters.sketch.estimate(word) - count) / count for word, count in truth]
+    print(f"{total} words, {len(exact)} distinct; top {top_k}, epsilon {epsilon}, delta {delta}")
+    print(f"  exact Counter: {exact_seconds:6.2f}s, peak {exact_peak / 2 ** 20:8.1f} MiB")
+    print(f"  sketch:        {sketch_seconds:6.2f}s, peak {sketch_peak / 2 ** 20:8.1f} MiB "
+          f"({hitters.sketch.depth} x {hitters.sketch.width} table, {hitters.nbytes / 2 ** 20:.1f} MiB)")
+    print(f"  top-{top_k} recall {recall:.0%}, mean relative overestimate {sum(errors) / len(errors):.4%}, "
+          f"bound epsilon * N = {epsilon * total:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Most frequent words, exactly or with a Count-Min sketch.")
+    parser.add_argument("paths", nargs="*", help="files and directories to read")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="number of words to list")
+    parser.add_argument("--mode", choices=("auto", "exact", "sketch"), default="auto",
+                        help=f"auto uses exact counting below {EXACT_LIMIT // 2 ** 20} MB of input")
+    parser.add_argument("--epsilon", type=float, default=DEFAULT_EPSILON,
+                        help="sketch error bound as a fraction of total words (sets the width)")
+    parser.add_argument("--delta", type=float, default=DEFAULT_DELTA,
+                        help="probability of exceeding the error bound (sets the depth)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--benchmark", type=int, metavar="WORDS", help="compare both paths on a Zipf corpus")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.top, args.epsilon, args.delta)
+        return
+    if not args.paths:
+        parser.error("give files or directories to read, or --benchmark")
+    mode, ranked = top_words(args.paths, args.top, args.mode, args.epsilon, args.delta, args.workers)
+    print(f"Top {args.top} words ({mode}):")
+    for word, count in ranked:
+        print(f"{count:>12} {word}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
+import argparse
+import codecs
+import sys
+
+# Bytes read per chunk when streaming files or stdin
+CHUNK_SIZE = 1 << 20
+
 def count_words(text):
     """
     Function to count the number of words in the input text.
@@ -13,7 +20,85 @@ def count_words(text):
     # Return the length of the list of words
     return len(words)
 
-def main():
+def count_words_stream(stream, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Function to count the words in a binary stream without holding it in memory.
+    
+    The stream is read in fixed-size chunks and decoded incrementally, so a
+    multi-byte character split between two chunks is decoded correctly. A word
+    cut in two by a chunk boundary is counted once. The result is the same as
+    len(stream.read().decode(encoding).split()).
+    
+    Parameters:
+    stream (binary file): The stream to read, e.g. open(path, "rb") or sys.stdin.buffer.
+    chunk_size (int): Number of bytes to read at a time.
+    encoding (str): Text encoding; undecodable bytes count as non-whitespace.
+    
+    Returns:
+    int: The number of words in the stream.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    total = 0
+    in_word = False  # Whether the text so far ends inside a word
+    while True:
+        data = stream.read(chunk_size)
+        text = decoder.decode(data, final=not data)
+        if text:
+            total += count_words(text)
+            # The first word of this chunk continues the last one of the previous chunk
+            if in_word and not text[0].isspace():
+                total -= 1
+            in_word = not text[-1].isspace()
+        if not data:
+            return total
+
+def iter_words(stream, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Function to yield the words of a binary stream one at a time.
+    
+    Reads the stream in chunks like count_words_stream and yields the same
+    words as stream.read().decode(encoding).split(), joining words cut by a
+    chunk boundary.
+    
+    Parameters:
+    stream (binary file): The stream to read.
+    chunk_size (int): Number of bytes to read at a time.
+    encoding (str): Text encoding; undecodable bytes count as non-whitespace.
+    
+    Returns:
+    generator: The words of the stream, in order.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    partial = ""  # Trailing word of the previous chunk, possibly incomplete
+    while True:
+        data = stream.read(chunk_size)
+        text = partial + decoder.decode(data, final=not data)
+        words = text.split()
+        partial = ""
+        if data and words and not text[-1].isspace():
+            partial = words.pop()
+        yield from words
+        if not data:
+            return
+
+def count_words_in_file(path, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Function to count the words in a file, or in stdin if path is "-".
+    
+    Parameters:
+    path (str): Path of the file to count.
+    chunk_size (int): Number of bytes to read at a time.
+    encoding (str): Text encoding of the file.
+    
+    Returns:
+    int: The number of words in the file.
+    """
+    if path == "-":
+        return count_words_stream(sys.stdin.buffer, chunk_size, encoding)
+    with open(path, "rb") as file:
+        return count_words_stream(file, chunk_size, encoding)
+
+def interactive():
     # User input prompt
     print("Welcome to Word Counter!")
     text = input("Please enter a sentence or paragraph: ").strip()  # Remove leading/trailing whitespace
@@ -29,5 +114,25 @@ def main():
     # Output display
     print(f"\nWord count: {word_count}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Count the words in files or stdin.")
+    parser.add_argument("paths", nargs="*", help='files to count ("-" for stdin); prompts for text if omitted')
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="bytes read at a time")
+    parser.add_argument("--encoding", default="utf-8", help="text encoding of the input")
+    args = parser.parse_args()
+
+    # No files and a terminal on stdin: ask for text as before
+    if not args.paths and sys.stdin.isatty():
+        interactive()
+        return
+
+    total = 0
+    for path in args.paths or ["-"]:
+        word_count = count_words_in_file(path, args.chunk_size, args.encoding)
+        total += word_count
+        print(f"{word_count:>12} {path}")
+    if len(args.paths) > 1:
+        print(f"{total:>12} total")
+
 if __name__ == "__main__":
     main()